@@ -13,4 +13,5 @@ python3 manage.py loaddata wishlist_items
 python3 manage.py loaddata friends
 python3 manage.py loaddata profiles
 python3 manage.py loaddata pins
-python3 manage.py loaddata purchases
\ No newline at end of file
+python3 manage.py loaddata purchases
+python3 manage.py repair_purchase_quantities
\ No newline at end of file
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class WishapiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'wishapi'
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
@@ -0,0 +1,113 @@
+import copy
+import logging
+import threading
+import time
+from collections import OrderedDict
+from rest_framework.authentication import TokenAuthentication
+
+logger = logging.getLogger(__name__)
+
+# Tokens cached per process. Invalidation only reaches the process that made
+# the change, so the timeout bounds how long other processes may keep
+# accepting a deleted token or an inactive user.
+TOKEN_CACHE_SIZE = 10000
+TOKEN_CACHE_TIMEOUT = 60
+
+# Log the hit rate after this many lookups
+TOKEN_CACHE_REPORT_EVERY = 10000
+
+
+class TokenCache:
+    """Thread safe LRU of token key -> (user, token) with a timeout"""
+
+    def __init__(self, maxsize, timeout, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return a copy of the cached (user, token) pair, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self.clock():
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            lookups = self.hits + self.misses
+
+        if lookups % TOKEN_CACHE_REPORT_EVERY == 0:
+            logger.info("Token cache stats: %s", self.stats())
+
+        if entry is None:
+            return None
+
+        # Each request gets its own instances, so changes made to
+        # request.user by a view never leak into other requests
+        _, user, token = entry
+        user = copy.copy(user)
+        token = copy.copy(token)
+        token.user = user
+        return user, token
+
+    def set(self, key, user, token):
+        with self._lock:
+            self._entries[key] = (self.clock() + self.timeout, user, token)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key=None, user_id=None):
+        """Drop a token by key, or every token belonging to a user"""
+        with self._lock:
+            if key is not None:
+                self._entries.pop(key, None)
+            if user_id is not None:
+                for cached_key, (_, user, _) in list(self._entries.items()):
+                    if user.pk == user_id:
+                        del self._entries[cached_key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self._entries),
+        }
+
+
+token_cache = TokenCache(TOKEN_CACHE_SIZE, TOKEN_CACHE_TIMEOUT)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that remembers recently used tokens, so most
+    requests are authenticated without querying the token and user tables.
+
+    Only valid tokens of active users are cached. Cached entries are dropped
+    when their token or user is saved or deleted, see wishapi.signals.
+    """
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is not None:
+            return cached
+
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, user, token)
+        return (user, token)
@@ -0,0 +1,26 @@
+from django.core.checks import Tags, Warning, register
+from django.db import connections
+from wishapi.services import missing_search_triggers
+
+
+@register(Tags.database)
+def check_search_triggers(databases=None, **kwargs):
+    """
+    Warn when full-text search triggers are missing.
+
+    SQLite rebuilds a table to alter most of its columns, which drops the
+    table's triggers without an error, and searches then go stale.
+    """
+    warnings = []
+    for alias in databases or []:
+        missing = missing_search_triggers(connections[alias])
+        if missing:
+            warnings.append(
+                Warning(
+                    f"Full-text search triggers are missing: {', '.join(missing)}",
+                    hint="Run 'manage.py rebuild_search_indexes'.",
+                    obj=alias,
+                    id="wishapi.W001",
+                )
+            )
+    return warnings
@@ -0,0 +1,116 @@
+import functools
+import hashlib
+import uuid
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import patch_cache_control
+from rest_framework import status
+from rest_framework.response import Response
+from wishapi.response_cache import generations
+from wishapi.routers import after_replication
+
+
+def _version_key(kind, pk):
+    return f"version:{kind}:{pk}"
+
+
+def resource_versions(*resources):
+    """
+    Return the current version of each (kind, pk) resource.
+
+    Like model generations, versions are opaque values that are replaced
+    whenever the resource changes, see wishapi.signals. A version that was
+    never set, or was evicted from the cache, is started lazily, which at
+    worst makes clients download an unchanged resource once more.
+    """
+    keys = [_version_key(kind, pk) for kind, pk in resources]
+    current = cache.get_many(keys)
+
+    for key in keys:
+        if key not in current:
+            # Keep the value another request may have just stored. Caches
+            # that store nothing, like DummyCache, get a new value each time.
+            started = uuid.uuid4().hex
+            cache.add(key, started, None)
+            current[key] = cache.get(key, started)
+
+    return [current[key] for key in keys]
+
+
+def bump_versions(kind, *pks):
+    """
+    Give resources new versions now, again once the transaction commits and
+    again once read replicas have caught up
+    """
+
+    def bump():
+        cache.set_many({_version_key(kind, pk): uuid.uuid4().hex for pk in pks}, None)
+
+    bump()
+    transaction.on_commit(bump)
+    after_replication(bump)
+
+
+def _matches(if_none_match, tag):
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    # GET compares entity tags weakly, so W/ prefixes are ignored
+    return tag in [candidate.removeprefix("W/") for candidate in candidates]
+
+
+def current_etag(request, resources, models):
+    """
+    The ETag of a response built from (kind, pk) resources and models, for
+    the requesting user and query params
+    """
+    parts = [
+        request.build_absolute_uri("/"),
+        str(request.user.pk),
+        repr(sorted(request.GET.lists())),
+        *resource_versions(*resources),
+        *generations(*models),
+    ]
+    return '"{}"'.format(hashlib.md5("\n".join(parts).encode()).hexdigest())
+
+
+def is_not_modified(request, tag):
+    """Whether the request's If-None-Match holds tag"""
+    return _matches(request.headers.get("If-None-Match", ""), tag)
+
+
+def etag(resources, *models, cache_control=None):
+    """
+    Answer a viewset GET handler with 304 Not Modified when the client's
+    If-None-Match holds the current ETag, and add an ETag to 200 responses.
+
+    resources is called with the request and route kwargs and returns the
+    (kind, pk) resources the response is built from. models lists models
+    whose rows are shown in the response but that don't bump those
+    resources, e.g. users' names. The ETag is derived from versions and
+    generations alone, so a match is answered without running the handler.
+
+    cache_control holds patch_cache_control arguments for both 200 and 304
+    responses, so revalidated clients keep the same freshness lifetime.
+    """
+
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            tag = current_etag(request, resources(request, **kwargs), models)
+
+            if is_not_modified(request, tag):
+                response = Response(
+                    status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": tag}
+                )
+            else:
+                response = handler(view, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                response["ETag"] = tag
+
+            if cache_control:
+                patch_cache_control(response, **cache_control)
+            return response
+
+        return wrapper
+
+    return decorator
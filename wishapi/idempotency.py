@@ -0,0 +1,153 @@
+import functools
+import hashlib
+import json
+from datetime import timedelta
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from wishapi.models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+# Clients may retry with the same key for this long, after which the stored
+# response is ignored and deleted by the clear_idempotency_keys command
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+
+# A request that hasn't stored its response after this long is assumed to
+# have died, and a retry runs it again
+IN_PROGRESS_TIMEOUT = timedelta(seconds=60)
+
+
+def _scoped_key(request, key):
+    parts = [str(request.user.pk), request.method, request.path, key]
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+
+def _encode(value):
+    if hasattr(value, "chunks"):
+        # Uploaded files are compared by content
+        digest = hashlib.sha256()
+        for chunk in value.chunks():
+            digest.update(chunk)
+        value.seek(0)
+        return digest.hexdigest()
+    return str(value)
+
+
+def _fingerprint(request):
+    data = request.data
+    if hasattr(data, "lists"):
+        data = sorted(data.lists())
+    body = json.dumps(data, sort_keys=True, default=_encode)
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def _claim(key, fingerprint):
+    """
+    Reserve key for this request, or return the response to send instead.
+
+    A new key costs the insert of the placeholder row that marks the
+    request as in progress. Only keys that were used before are read back.
+    """
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            IdempotencyKey.objects.create(key=key, fingerprint=fingerprint, created=now)
+        return None
+    except IntegrityError:
+        pass
+
+    try:
+        stored = IdempotencyKey.objects.get(key=key)
+    except IdempotencyKey.DoesNotExist:
+        # Deleted since the insert failed, by a failed request or a cleanup
+        return _in_progress()
+
+    expired = stored.created < now - IDEMPOTENCY_KEY_TTL
+    if not expired:
+        if stored.fingerprint != fingerprint:
+            return Response(
+                {
+                    "reason": f"{IDEMPOTENCY_HEADER} was already used "
+                    "for another request"
+                },
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+
+        if stored.status is not None:
+            response = Response(stored.response, status=stored.status)
+            response["Idempotent-Replayed"] = "true"
+            return response
+
+        if stored.created >= now - IN_PROGRESS_TIMEOUT:
+            return _in_progress()
+
+    # Start over on an expired key, or take over from a request that died,
+    # unless another retry just did
+    taken = IdempotencyKey.objects.filter(pk=stored.pk, created=stored.created).update(
+        fingerprint=fingerprint, status=None, response=None, created=now
+    )
+    return None if taken else _in_progress()
+
+
+def _in_progress():
+    return Response(
+        {"reason": f"A request with this {IDEMPOTENCY_HEADER} is in progress"},
+        status=status.HTTP_409_CONFLICT,
+    )
+
+
+def idempotent(handler):
+    """
+    Let clients safely retry a viewset POST handler.
+
+    Requests sent with an Idempotency-Key header run once per user, route
+    and key: retries get the stored response back, with an
+    Idempotent-Replayed header, instead of writing again. The response is
+    stored in the transaction that made the handler's writes, so one is
+    never committed without the other. Server errors aren't stored, so
+    those requests can be retried. Requests without the header are handled
+    as before.
+    """
+
+    @functools.wraps(handler)
+    def wrapper(view, request, *args, **kwargs):
+        client_key = request.headers.get(IDEMPOTENCY_HEADER)
+        if client_key is None:
+            return handler(view, request, *args, **kwargs)
+
+        if not client_key or len(client_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            return Response(
+                {
+                    "reason": f"{IDEMPOTENCY_HEADER} must be 1 to "
+                    f"{IDEMPOTENCY_KEY_MAX_LENGTH} characters"
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        key = _scoped_key(request, client_key)
+        refused = _claim(key, _fingerprint(request))
+        if refused is not None:
+            return refused
+
+        try:
+            with transaction.atomic():
+                # Handlers that catch a failed write and answer 400 leave
+                # their savepoint to roll back, not the whole transaction
+                with transaction.atomic():
+                    response = handler(view, request, *args, **kwargs)
+                if response.status_code < 500:
+                    IdempotencyKey.objects.filter(key=key).update(
+                        status=response.status_code, response=response.data
+                    )
+        except BaseException:
+            IdempotencyKey.objects.filter(key=key, status=None).delete()
+            raise
+
+        if response.status_code >= 500:
+            IdempotencyKey.objects.filter(key=key, status=None).delete()
+        return response
+
+    return wrapper
@@ -0,0 +1,129 @@
+import logging
+import threading
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Sum
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from wishapi.management.commands.benchmark_concurrency import database_copy
+from wishapi.models import Purchase, WishlistItem
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure checkout throughput with many buyers purchasing from the same "
+        "wishlist at once, and check that nothing is over-purchased"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--wishlist", type=int, default=5, help="Wishlist everyone buys from"
+        )
+        parser.add_argument(
+            "--buyers", type=int, default=16, help="Concurrent buyer threads"
+        )
+        parser.add_argument(
+            "--stock",
+            type=int,
+            default=100000,
+            help="Quantity remaining of each item at the start",
+        )
+        parser.add_argument(
+            "--seconds", type=float, default=5, help="Duration of the run"
+        )
+
+    def handle(self, *args, **options):
+        if connections["default"].vendor != "sqlite":
+            raise CommandError("This benchmark runs on a copy of a SQLite database")
+
+        tokens = list(Token.objects.values_list("key", flat=True))
+        item_ids = list(
+            WishlistItem.objects.filter(wishlist_id=options["wishlist"])
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        if not item_ids:
+            raise CommandError(f"Wishlist {options['wishlist']} has no items")
+
+        # Sold out checkouts are counted, not logged one by one
+        request_logger = logging.getLogger("django.request")
+        level = request_logger.level
+        request_logger.setLevel(logging.CRITICAL)
+
+        try:
+            with override_settings(ALLOWED_HOSTS=["testserver"]), database_copy(
+                getattr(settings, "SQLITE_PRAGMAS", {}),
+                connections.settings["default"].get("OPTIONS", {}),
+            ):
+                WishlistItem.objects.filter(pk__in=item_ids).update(
+                    quantity=options["stock"], purchased_quantity=0
+                )
+                Purchase.objects.filter(wishlist_item_id__in=item_ids).delete()
+
+                counts = self.run_load(
+                    tokens, item_ids, options["buyers"], options["seconds"]
+                )
+                oversold = self.oversold(item_ids)
+        finally:
+            request_logger.setLevel(level)
+
+        seconds = options["seconds"]
+        self.stdout.write(
+            f"{options['buyers']} buyers, {len(item_ids)} item(s): "
+            f"{counts[201] / seconds:.1f} checkouts/s, "
+            f"{counts[400]} sold out, {counts['other']} failed"
+        )
+        if oversold:
+            raise CommandError(f"Over-purchased items: {oversold}")
+        self.stdout.write(self.style.SUCCESS("No item was over-purchased"))
+
+    def run_load(self, tokens, item_ids, buyers, seconds):
+        counts = {201: 0, 400: 0, "other": 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + seconds
+
+        def buyer(number):
+            client = APIClient()
+            client.credentials(
+                HTTP_AUTHORIZATION=f"Token {tokens[number % len(tokens)]}"
+            )
+            # Each buyer takes one of two items, rotated so carts overlap
+            first = number % len(item_ids)
+            lines = [
+                {"wishlist_item": item_ids[first]},
+                {"wishlist_item": item_ids[(first + 1) % len(item_ids)]},
+            ]
+            try:
+                while time.perf_counter() < deadline:
+                    response = client.post(
+                        "/purchases/checkout", {"items": lines}, format="json"
+                    )
+                    with lock:
+                        key = response.status_code
+                        counts[key if key in counts else "other"] += 1
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=buyer, args=(n,)) for n in range(buyers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return counts
+
+    def oversold(self, item_ids):
+        totals = dict(
+            Purchase.objects.filter(wishlist_item_id__in=item_ids)
+            .values_list("wishlist_item_id")
+            .annotate(total=Sum("quantity"))
+        )
+        return [
+            item.pk
+            for item in WishlistItem.objects.filter(pk__in=item_ids)
+            if item.purchased_quantity > item.quantity
+            or item.purchased_quantity != totals.get(item.pk, 0)
+        ]
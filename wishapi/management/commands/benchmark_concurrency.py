@@ -0,0 +1,171 @@
+import contextlib
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from wishapi.models import WishlistItem
+
+# The configuration before SQLITE_PRAGMAS, to compare against
+ROLLBACK_JOURNAL = ({"journal_mode": "DELETE"}, {})
+
+
+@contextlib.contextmanager
+def database_copy(pragmas, options):
+    """
+    Point the default database at a scratch copy for the duration, so the
+    benchmark's purchases never reach the real database.
+    """
+    settings_dict = connections.settings["default"]
+    source = settings_dict["NAME"]
+    original = (settings_dict["NAME"], settings_dict["OPTIONS"])
+
+    directory = tempfile.mkdtemp()
+    copy = os.path.join(directory, "benchmark.sqlite3")
+    with sqlite3.connect(source) as src, sqlite3.connect(copy) as dst:
+        src.backup(dst)
+
+    connections.close_all()
+    settings_dict["NAME"], settings_dict["OPTIONS"] = copy, options
+    try:
+        with override_settings(SQLITE_PRAGMAS=pragmas):
+            yield
+    finally:
+        connections.close_all()
+        settings_dict["NAME"], settings_dict["OPTIONS"] = original
+        shutil.rmtree(directory)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure read throughput while purchases are being written, with the "
+        "old rollback journal and with the SQLITE_PRAGMAS configuration"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user", type=int, default=1, help="User to send requests as"
+        )
+        parser.add_argument(
+            "--item", type=int, default=None, help="Wishlist item to purchase"
+        )
+        parser.add_argument(
+            "--readers", type=int, default=8, help="Threads reading a wishlist"
+        )
+        parser.add_argument(
+            "--writers", type=int, default=4, help="Threads creating purchases"
+        )
+        parser.add_argument(
+            "--seconds", type=float, default=5, help="Duration of each run"
+        )
+
+    def handle(self, *args, **options):
+        if connections["default"].vendor != "sqlite":
+            raise CommandError("This benchmark compares SQLite configurations")
+
+        try:
+            token = Token.objects.get(user_id=options["user"])
+        except Token.DoesNotExist:
+            raise CommandError(f"User {options['user']} has no token")
+
+        items = WishlistItem.objects.exclude(wishlist__user_id=options["user"])
+        if options["item"]:
+            items = items.filter(pk=options["item"])
+        item = items.filter(wishlist__private=False).first()
+        if item is None:
+            raise CommandError("No public wishlist item to purchase")
+
+        settings_dict = connections.settings["default"]
+        configurations = {
+            "rollback journal": ROLLBACK_JOURNAL,
+            "WAL + pragmas": (
+                getattr(settings, "SQLITE_PRAGMAS", {}),
+                settings_dict.get("OPTIONS", {}),
+            ),
+        }
+
+        # Failed requests are counted, not logged one by one
+        request_logger = logging.getLogger("django.request")
+        level = request_logger.level
+        request_logger.setLevel(logging.CRITICAL)
+
+        # Measure the database rather than the response cache, and accept
+        # the in-process client's host
+        try:
+            with override_settings(
+                CACHES={
+                    "default": {
+                        "BACKEND": "django.core.cache.backends.dummy.DummyCache"
+                    }
+                },
+                ALLOWED_HOSTS=["testserver"],
+            ):
+                for name, (pragmas, db_options) in configurations.items():
+                    for writers in (0, options["writers"]):
+                        with database_copy(pragmas, db_options):
+                            # Never run out of quantity during the run
+                            WishlistItem.objects.filter(pk=item.pk).update(
+                                quantity=10**9
+                            )
+                            result = self.run_load(
+                                token.key,
+                                item,
+                                options["readers"],
+                                writers,
+                                options["seconds"],
+                            )
+                        self.report(name, writers, result, options["seconds"])
+        finally:
+            request_logger.setLevel(level)
+
+    def run_load(self, token, item, readers, writers, seconds):
+        counts = {"reads": 0, "writes": 0, "errors": 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + seconds
+
+        def worker(request):
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+            try:
+                while time.perf_counter() < deadline:
+                    kind, ok = request(client)
+                    with lock:
+                        counts[kind if ok else "errors"] += 1
+            finally:
+                connections.close_all()
+
+        def read(client):
+            response = client.get(f"/wishlists/{item.wishlist_id}")
+            return "reads", response.status_code == 200
+
+        def write(client):
+            response = client.post(
+                "/purchases", {"wishlist_item": item.pk, "quantity": 1}, format="json"
+            )
+            return "writes", response.status_code == 201
+
+        threads = [
+            threading.Thread(target=worker, args=(read,)) for _ in range(readers)
+        ] + [threading.Thread(target=worker, args=(write,)) for _ in range(writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return counts
+
+    def report(self, name, writers, counts, seconds):
+        self.stdout.write(
+            f"{name:<17} {writers} writer(s)  "
+            f"{counts['reads'] / seconds:8.1f} reads/s  "
+            f"{counts['writes'] / seconds:7.1f} writes/s  "
+            f"{counts['errors']} error(s)"
+        )
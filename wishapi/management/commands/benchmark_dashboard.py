@@ -0,0 +1,97 @@
+import asyncio
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, override_settings
+from rest_framework.authtoken.models import Token
+
+# Both variants of each endpoint, sync view first
+ENDPOINTS = {
+    "dashboard": ("/profile", "/async/profile"),
+    "profile": ("/profile/{user}", "/async/profile/{user}"),
+}
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare p50/p99 latency of the sync and async profile endpoints "
+        "under concurrent load through the ASGI handler"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user", type=int, default=1, help="User to request the dashboard as"
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=200,
+            help="Requests per endpoint variant",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=20,
+            help="Requests in flight at once",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            token = Token.objects.get(user_id=options["user"])
+        except Token.DoesNotExist:
+            raise CommandError(f"User {options['user']} has no token")
+
+        headers = {"Authorization": f"Token {token.key}"}
+
+        # Measure the database work rather than the response cache, and
+        # accept the in-process client's host
+        with override_settings(
+            CACHES={
+                "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+            },
+            ALLOWED_HOSTS=["testserver"],
+        ):
+            for name, urls in ENDPOINTS.items():
+                for url in urls:
+                    url = url.format(user=options["user"])
+                    samples, elapsed = asyncio.run(
+                        self.run_load(
+                            url,
+                            headers,
+                            options["requests"],
+                            options["concurrency"],
+                        )
+                    )
+                    self.stdout.write(
+                        f"{name:<10} {url:<22} "
+                        f"p50 {percentile(samples, 0.5) * 1000:7.2f}ms  "
+                        f"p99 {percentile(samples, 0.99) * 1000:7.2f}ms  "
+                        f"mean {statistics.mean(samples) * 1000:7.2f}ms  "
+                        f"{len(samples) / elapsed:7.1f} req/s"
+                    )
+
+    async def run_load(self, url, headers, requests, concurrency):
+        client = AsyncClient()
+        slots = asyncio.Semaphore(concurrency)
+        samples = []
+
+        async def timed_request():
+            async with slots:
+                started = time.perf_counter()
+                response = await client.get(url, headers=headers)
+                samples.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    raise CommandError(f"GET {url} returned {response.status_code}")
+
+        # Warm up connections and the token cache before measuring
+        await timed_request()
+        samples.clear()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(timed_request() for _ in range(requests)))
+        return samples, time.perf_counter() - started
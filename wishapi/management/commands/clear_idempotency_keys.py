@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from wishapi.idempotency import IDEMPOTENCY_KEY_TTL
+from wishapi.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete stored Idempotency-Key responses older than the retry window. "
+        "Run it periodically, e.g. hourly from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows to delete at a time",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - IDEMPOTENCY_KEY_TTL
+        expired = IdempotencyKey.objects.filter(created__lt=cutoff)
+
+        # Short batches keep each write lock brief on a live database
+        deleted = 0
+        while True:
+            batch = list(expired.values_list("pk", flat=True)[: options["batch_size"]])
+            if not batch:
+                break
+            deleted += IdempotencyKey.objects.filter(pk__in=batch).delete()[0]
+
+        self.stdout.write(f"Deleted {deleted} expired idempotency key(s)")
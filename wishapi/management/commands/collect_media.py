@@ -0,0 +1,91 @@
+import posixpath
+from datetime import timedelta
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from wishapi.models import Profile
+
+
+def walk(storage, directory):
+    """Yield the name of every file below directory in storage"""
+    try:
+        directories, files = storage.listdir(directory)
+    except FileNotFoundError:
+        return
+
+    for name in files:
+        yield posixpath.join(directory, name)
+    for name in directories:
+        yield from walk(storage, posixpath.join(directory, name))
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete profile images and thumbnails that no Profile references. "
+        "Files are shared between profiles by content, so this is the only "
+        "place they are deleted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report unreferenced files without deleting them",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of profiles to read, and files to delete, at a time",
+        )
+        parser.add_argument(
+            "--min-age",
+            type=int,
+            default=60 * 60,
+            help=(
+                "Keep files modified in the last this many seconds, which may "
+                "belong to uploads that haven't committed yet"
+            ),
+        )
+        parser.add_argument(
+            "--directory",
+            default="profile",
+            help="Storage directory to collect",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+
+        referenced = set()
+        profiles = Profile.objects.values_list("image", "thumbnails")
+        for image, thumbnails in profiles.iterator(chunk_size=batch_size):
+            if image:
+                referenced.add(image)
+            referenced.update(thumbnails.values())
+
+        # Files saved or re-uploaded after this are newer than the cutoff
+        cutoff = timezone.now() - timedelta(seconds=options["min_age"])
+
+        batch = []
+        collected = 0
+        for name in walk(default_storage, options["directory"]):
+            if name in referenced or default_storage.get_modified_time(name) > cutoff:
+                continue
+
+            batch.append(name)
+            if len(batch) == batch_size:
+                collected += self.collect(batch, options["dry_run"])
+                batch = []
+        collected += self.collect(batch, options["dry_run"])
+
+        if options["dry_run"]:
+            self.stdout.write(f"{collected} file(s) would be deleted")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Deleted {collected} file(s)"))
+
+    def collect(self, names, dry_run):
+        for name in names:
+            self.stdout.write(name)
+            if not dry_run:
+                default_storage.delete(name)
+        return len(names)
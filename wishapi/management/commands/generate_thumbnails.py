@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from wishapi.models import Profile
+from wishapi.services.thumbnails import make_thumbnails
+
+
+class Command(BaseCommand):
+    help = "Make thumbnails for profile images uploaded before they existed"
+
+    def handle(self, *args, **options):
+        profiles = (
+            Profile.objects.exclude(image="")
+            .exclude(image__isnull=True)
+            .filter(thumbnails={})
+            .only("id", "image")
+        )
+
+        made = 0
+        for profile in profiles.iterator():
+            try:
+                make_thumbnails(profile.id, profile.image.name)
+            except (OSError, ValueError) as ex:
+                self.stderr.write(f"Profile {profile.id}: {ex}")
+                continue
+            made += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Made thumbnails for {made} profile(s)"))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from wishapi.services import missing_search_triggers, rebuild_search_indexes
+
+
+class Command(BaseCommand):
+    help = (
+        "Recreate the full-text search triggers and refill the search indexes. "
+        "Run after a migration rebuilds a searchable table, which drops them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database to rebuild the indexes of",
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        if connection.vendor != "sqlite":
+            self.stdout.write("Full-text indexes are only used on SQLite")
+            return
+
+        for trigger in missing_search_triggers(connection):
+            self.stdout.write(f"Restoring missing trigger {trigger}")
+
+        rebuild_search_indexes(connection)
+        self.stdout.write(self.style.SUCCESS("Rebuilt the search indexes"))
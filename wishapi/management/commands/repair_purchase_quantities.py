@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+from wishapi.conditional import bump_versions
+from wishapi.models import Wishlist, WishlistItem
+from wishapi.response_cache import bump_generation
+
+
+class Command(BaseCommand):
+    help = "Recompute WishlistItem.purchased_quantity from Purchase rows and fix drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report drifted items without writing any changes",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of items to update per query",
+        )
+
+    def handle(self, *args, **options):
+        # Totals are read and written in one transaction, so a purchase
+        # landing in between can't have its increment overwritten
+        with transaction.atomic():
+            # Include soft deleted items so their counters stay correct if restored
+            drifted = (
+                WishlistItem.all_objects.with_purchase_totals()
+                .exclude(purchased_quantity=F("purchased_total"))
+                .only("id", "purchased_quantity", "wishlist_id")
+            )
+
+            repaired = []
+            for item in drifted.iterator():
+                self.stdout.write(
+                    f"Item {item.id}: stored {item.purchased_quantity}, "
+                    f"actual {item.purchased_total}"
+                )
+                item.purchased_quantity = item.purchased_total
+                repaired.append(item)
+
+            if options["dry_run"]:
+                self.stdout.write(f"{len(repaired)} item(s) would be repaired")
+                return
+
+            WishlistItem.all_objects.bulk_update(
+                repaired, ["purchased_quantity"], batch_size=options["batch_size"]
+            )
+            # bulk_update sends no signals, so cached responses and the
+            # ETags of the repaired items' wishlists aren't refreshed
+            bump_generation(WishlistItem)
+            wishlists = Wishlist.all_objects.filter(
+                pk__in={item.wishlist_id for item in repaired}
+            ).values_list("pk", "user_id")
+            for wishlist_id, user_id in wishlists:
+                bump_versions("wishlist", wishlist_id)
+                bump_versions("wishlists", user_id)
+
+        self.stdout.write(self.style.SUCCESS(f"Repaired {len(repaired)} item(s)"))
@@ -0,0 +1,48 @@
+import sqlite3
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from wishapi.routers import replicas
+
+
+def copy_database(source, target):
+    """Copy a SQLite database file onto another with the online backup API"""
+    with sqlite3.connect(source) as src, sqlite3.connect(target) as dst:
+        src.backup(dst)
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database onto each replica in "
+        "DATABASE_REPLICAS, for trying out read replicas locally"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--watch",
+            type=float,
+            default=None,
+            help="Keep copying every this many seconds until interrupted",
+        )
+
+    def handle(self, *args, **options):
+        aliases = replicas()
+        if not aliases:
+            raise CommandError("DATABASE_REPLICAS is empty")
+
+        primary = connections[DEFAULT_DB_ALIAS]
+        for alias in [DEFAULT_DB_ALIAS, *aliases]:
+            if connections[alias].vendor != "sqlite":
+                raise CommandError(f"{alias} is not a SQLite database")
+
+        while True:
+            for alias in aliases:
+                copy_database(
+                    primary.settings_dict["NAME"],
+                    connections[alias].settings_dict["NAME"],
+                )
+            self.stdout.write(f"Synced {', '.join(aliases)}")
+
+            if options["watch"] is None:
+                return
+            time.sleep(options["watch"])
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:34
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_purchased_quantity(apps, schema_editor):
+    WishlistItem = apps.get_model("wishapi", "WishlistItem")
+    Purchase = apps.get_model("wishapi", "Purchase")
+
+    totals = (
+        Purchase.objects.filter(wishlist_item=OuterRef("pk"))
+        .values("wishlist_item")
+        .annotate(total=Sum("quantity"))
+        .values("total")
+    )
+    WishlistItem.objects.update(purchased_quantity=Coalesce(Subquery(totals), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wishapi', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wishlistitem',
+            name='purchased_quantity',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_purchased_quantity, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("wishapi", "0002_wishlistitem_purchased_quantity"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="friend",
+            index=models.Index(
+                fields=["user1", "accepted"], name="wishapi_fri_user1_i_ad86a2_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="friend",
+            index=models.Index(
+                fields=["user2", "accepted"], name="wishapi_fri_user2_i_bdef5e_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+from datetime import timedelta
+
+
+def backfill_feed(apps, schema_editor):
+    """Seed feeds with friends' public wishlists from the last two weeks"""
+    Wishlist = apps.get_model("wishapi", "Wishlist")
+    Friend = apps.get_model("wishapi", "Friend")
+    FeedEntry = apps.get_model("wishapi", "FeedEntry")
+
+    friends = {}
+    for user1_id, user2_id in Friend.objects.filter(accepted=True).values_list(
+        "user1_id", "user2_id"
+    ):
+        friends.setdefault(user1_id, set()).add(user2_id)
+        friends.setdefault(user2_id, set()).add(user1_id)
+
+    recent_wishlists = Wishlist.objects.filter(
+        private=False,
+        deleted__isnull=True,
+        creation_date__gte=timezone.now() - timedelta(weeks=2),
+    )
+    FeedEntry.objects.bulk_create(
+        [
+            FeedEntry(
+                user_id=user_id, wishlist_id=wishlist.id, created=wishlist.creation_date
+            )
+            for wishlist in recent_wishlists
+            for user_id in friends.get(wishlist.user_id, ())
+        ],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("wishapi", "0003_friend_accepted_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FeedEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created", models.DateTimeField()),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="feed_entries",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "wishlist",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="feed_entries",
+                        to="wishapi.wishlist",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["user", "-created"],
+                        name="wishapi_fee_user_id_d05cad_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("user", "wishlist"), name="unique_feed_entry"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_feed, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("wishapi", "0004_feedentry"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="wishlist",
+            index=models.Index(
+                fields=["user", "private", "date_of_event"],
+                name="wishapi_wis_user_id_1320c4_idx",
+            ),
+        ),
+    ]
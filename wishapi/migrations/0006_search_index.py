@@ -0,0 +1,91 @@
+from django.db import migrations
+
+# FTS5 indexes over the searchable text of live wishlists and items. They use
+# the model tables as external content, so only the index itself is stored,
+# and are kept in sync by triggers: rows enter the index on insert or
+# restore and leave it on delete or soft delete. Updates that don't touch
+# the indexed columns, e.g. purchase counters, skip the index entirely.
+SEARCH_INDEXES = (
+    ("wishapi_wishlist", "wishapi_wishlist_search", ("title", "description")),
+    ("wishapi_wishlistitem", "wishapi_wishlistitem_search", ("name", "note")),
+)
+
+
+def index_sql(table, index, columns):
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    changed = " OR ".join(f"old.{column} IS NOT new.{column}" for column in columns)
+
+    return [
+        f"""
+        CREATE VIRTUAL TABLE {index} USING fts5(
+            {column_list},
+            content='{table}',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        )
+        """,
+        f"""
+        INSERT INTO {index}(rowid, {column_list})
+        SELECT id, {column_list} FROM {table} WHERE deleted IS NULL
+        """,
+        f"""
+        CREATE TRIGGER {index}_insert AFTER INSERT ON {table}
+        WHEN new.deleted IS NULL
+        BEGIN
+            INSERT INTO {index}(rowid, {column_list})
+            VALUES (new.id, {new_values});
+        END
+        """,
+        f"""
+        CREATE TRIGGER {index}_delete AFTER DELETE ON {table}
+        WHEN old.deleted IS NULL
+        BEGIN
+            INSERT INTO {index}({index}, rowid, {column_list})
+            VALUES ('delete', old.id, {old_values});
+        END
+        """,
+        f"""
+        CREATE TRIGGER {index}_update AFTER UPDATE ON {table}
+        WHEN {changed} OR (old.deleted IS NULL) IS NOT (new.deleted IS NULL)
+        BEGIN
+            INSERT INTO {index}({index}, rowid, {column_list})
+            SELECT 'delete', old.id, {old_values} WHERE old.deleted IS NULL;
+            INSERT INTO {index}(rowid, {column_list})
+            SELECT new.id, {new_values} WHERE new.deleted IS NULL;
+        END
+        """,
+    ]
+
+
+def create_search_indexes(apps, schema_editor):
+    # Full-text search falls back to LIKE filters on other databases
+    if schema_editor.connection.vendor != "sqlite":
+        return
+
+    for table, index, columns in SEARCH_INDEXES:
+        for sql in index_sql(table, index, columns):
+            schema_editor.execute(sql)
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+
+    for table, index, columns in SEARCH_INDEXES:
+        for trigger in ("insert", "delete", "update"):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {index}_{trigger}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {index}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("wishapi", "0005_wishlist_event_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,83 @@
+from django.conf import settings
+from django.db import migrations
+
+# FTS5 index over people's names and usernames for the user directory and
+# friend search, kept in sync with the user table by triggers like the
+# wishlist indexes in 0006_search_index. Updates that don't touch a name,
+# e.g. last_login on every login, skip the index.
+INDEX = "wishapi_user_search"
+COLUMNS = ("first_name", "last_name", "username")
+
+
+def create_user_search_index(apps, schema_editor):
+    # Full-text search falls back to LIKE filters on other databases
+    if schema_editor.connection.vendor != "sqlite":
+        return
+
+    table = apps.get_model(settings.AUTH_USER_MODEL)._meta.db_table
+    column_list = ", ".join(COLUMNS)
+    new_values = ", ".join(f"new.{column}" for column in COLUMNS)
+    old_values = ", ".join(f"old.{column}" for column in COLUMNS)
+    changed = " OR ".join(f"old.{column} IS NOT new.{column}" for column in COLUMNS)
+
+    for sql in (
+        f"""
+        CREATE VIRTUAL TABLE {INDEX} USING fts5(
+            {column_list},
+            content='{table}',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='1 2 3'
+        )
+        """,
+        f"""
+        INSERT INTO {INDEX}(rowid, {column_list})
+        SELECT id, {column_list} FROM {table}
+        """,
+        f"""
+        CREATE TRIGGER {INDEX}_insert AFTER INSERT ON {table}
+        BEGIN
+            INSERT INTO {INDEX}(rowid, {column_list})
+            VALUES (new.id, {new_values});
+        END
+        """,
+        f"""
+        CREATE TRIGGER {INDEX}_delete AFTER DELETE ON {table}
+        BEGIN
+            INSERT INTO {INDEX}({INDEX}, rowid, {column_list})
+            VALUES ('delete', old.id, {old_values});
+        END
+        """,
+        f"""
+        CREATE TRIGGER {INDEX}_update AFTER UPDATE ON {table}
+        WHEN {changed}
+        BEGIN
+            INSERT INTO {INDEX}({INDEX}, rowid, {column_list})
+            VALUES ('delete', old.id, {old_values});
+            INSERT INTO {INDEX}(rowid, {column_list})
+            VALUES (new.id, {new_values});
+        END
+        """,
+    ):
+        schema_editor.execute(sql)
+
+
+def drop_user_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+
+    for trigger in ("insert", "delete", "update"):
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS {INDEX}_{trigger}")
+    schema_editor.execute(f"DROP TABLE IF EXISTS {INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("wishapi", "0006_search_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(create_user_search_index, drop_user_search_index),
+    ]
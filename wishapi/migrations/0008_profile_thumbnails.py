@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("wishapi", "0007_user_search_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="profile",
+            name="thumbnails",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
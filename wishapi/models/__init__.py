@@ -5,3 +5,5 @@ from .friend import Friend
 from .purchase import Purchase
 from .profile import Profile
 from .pin import Pin
+from .feed_entry import FeedEntry
+from .idempotency_key import IdempotencyKey
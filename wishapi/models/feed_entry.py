@@ -0,0 +1,23 @@
+from django.db import models
+from django.contrib.auth.models import User
+from .wishlist import Wishlist
+
+
+class FeedEntry(models.Model):
+    """A friend's public wishlist pushed into a user's activity feed"""
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="feed_entries"
+    )
+    wishlist = models.ForeignKey(
+        Wishlist, on_delete=models.CASCADE, related_name="feed_entries"
+    )
+    created = models.DateTimeField()
+
+    class Meta:
+        indexes = [models.Index(fields=["user", "-created"])]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "wishlist"], name="unique_feed_entry"
+            )
+        ]
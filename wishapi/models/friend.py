@@ -7,3 +7,9 @@ class Friend(models.Model):
     user1 = models.ForeignKey(User, on_delete=models.CASCADE, related_name="friends1")
     user2 = models.ForeignKey(User, on_delete=models.CASCADE, related_name="friends2")
     accepted = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user1", "accepted"]),
+            models.Index(fields=["user2", "accepted"]),
+        ]
@@ -0,0 +1,15 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+
+class IdempotencyKey(models.Model):
+    """The stored response to a request sent with an Idempotency-Key header"""
+
+    # SHA-256 of the user, method, path and the client's key
+    key = models.CharField(max_length=64, unique=True)
+    # SHA-256 of the request data, to refuse reusing a key for another request
+    fingerprint = models.CharField(max_length=64)
+    # Null while the first request with the key is still running
+    status = models.PositiveSmallIntegerField(null=True)
+    response = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    created = models.DateTimeField(db_index=True)
@@ -6,6 +6,8 @@ class Profile(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="profile")
     bio = models.CharField(max_length=255, blank=True)
     image = models.ImageField(upload_to="profile", blank=True, null=True)
+    # Resized copies of image keyed by size, see wishapi.services.thumbnails
+    thumbnails = models.JSONField(default=dict, blank=True)
     icon = models.IntegerField(blank=True, null=True)
     birthday = models.DateField(blank=True, null=True)
     address = models.CharField(max_length=255, blank=True)
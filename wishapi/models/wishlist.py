@@ -2,11 +2,35 @@ from django.db import models
 from django.contrib.auth.models import User
 from safedelete.models import SafeDeleteModel
 from safedelete.models import SOFT_DELETE_CASCADE
+from safedelete.managers import SafeDeleteManager, SafeDeleteAllManager
+from safedelete.queryset import SafeDeleteQueryset
+
+
+class WishlistQuerySet(SafeDeleteQueryset):
+    def with_items(self, items=None):
+        """
+        Load each wishlist's owner and its items, so a page of wishlists
+        serializes in a fixed number of queries. Priority names come from
+        the in-process priority registry rather than a join.
+
+        items optionally replaces the item queryset, e.g. to filter it.
+        """
+        from .wishlist_item import WishlistItem
+
+        if items is None:
+            items = WishlistItem.objects.all()
+
+        return self.select_related("user").prefetch_related(
+            models.Prefetch("items_in_list", queryset=items)
+        )
 
 
 class Wishlist(SafeDeleteModel):
     _safedelete_policy = SOFT_DELETE_CASCADE
 
+    objects = SafeDeleteManager.from_queryset(WishlistQuerySet)()
+    all_objects = SafeDeleteAllManager.from_queryset(WishlistQuerySet)()
+
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="wishlists")
     title = models.CharField(max_length=255)
     description = models.CharField(max_length=255)
@@ -16,3 +40,6 @@ class Wishlist(SafeDeleteModel):
     creation_date = models.DateTimeField(auto_now_add=True)
     date_of_event = models.DateTimeField(blank=True, null=True)
     pinned = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [models.Index(fields=["user", "private", "date_of_event"])]
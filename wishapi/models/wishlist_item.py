@@ -1,14 +1,28 @@
 from django.db import models
 from safedelete.models import SafeDeleteModel
 from safedelete.models import SOFT_DELETE
+from safedelete.managers import SafeDeleteManager, SafeDeleteAllManager
+from safedelete.queryset import SafeDeleteQueryset
 from .priority import Priority
 from .wishlist import Wishlist
 from django.db.models import Sum
+from django.db.models.functions import Coalesce
+
+
+class WishlistItemQuerySet(SafeDeleteQueryset):
+    def with_purchase_totals(self):
+        """Annotate each item with its purchase total summed from Purchase rows"""
+        return self.annotate(
+            purchased_total=Coalesce(Sum("purchased_item__quantity"), 0)
+        )
 
 
 class WishlistItem(SafeDeleteModel):
     _safedelete_policy = SOFT_DELETE
 
+    objects = SafeDeleteManager.from_queryset(WishlistItemQuerySet)()
+    all_objects = SafeDeleteAllManager.from_queryset(WishlistItemQuerySet)()
+
     wishlist = models.ForeignKey(
         Wishlist, on_delete=models.CASCADE, related_name="items_in_list"
     )
@@ -20,28 +34,13 @@ class WishlistItem(SafeDeleteModel):
         Priority, on_delete=models.SET_NULL, blank=True, null=True
     )
     creation_date = models.DateTimeField(auto_now_add=True)
+    # Running total of Purchase.quantity, maintained by the purchase views
+    purchased_quantity = models.IntegerField(default=0)
 
     @property
     def leftover_quantity(self):
-        # Calculate total purchased quantity
-        total_purchased_quantity = (
-            self.purchased_item.aggregate(total_quantity=Sum("quantity"))[
-                "total_quantity"
-            ]
-            or 0
-        )
+        return self.quantity - self.purchased_quantity
 
-        return self.quantity - total_purchased_quantity
-    
     @property
     def purchase_quantity(self):
-        # Calculate total purchased quantity
-        total_purchased_quantity = (
-            self.purchased_item.aggregate(total_quantity=Sum("quantity"))[
-                "total_quantity"
-            ]
-            or 0
-        )
-
-        return total_purchased_quantity
-
+        return self.purchased_quantity
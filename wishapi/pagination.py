@@ -0,0 +1,19 @@
+from rest_framework.pagination import CursorPagination
+
+
+class UserDirectoryPagination(CursorPagination):
+    """Cursor pages over the user directory, ordered by user id"""
+
+    ordering = "id"
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+
+class FeedPagination(CursorPagination):
+    """Cursor pages over a user's activity feed, newest first"""
+
+    ordering = "-created"
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
@@ -0,0 +1,121 @@
+import functools
+import hashlib
+import time
+import uuid
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+from wishapi.routers import after_replication
+
+# Cached responses are replaced whenever a model they depend on changes, so
+# the timeout only bounds how long unused entries linger
+RESPONSE_CACHE_TIMEOUT = 60 * 60
+
+# While one request rebuilds a missing response, others asking for the same
+# response wait for it instead of all querying the database at once
+REBUILD_LOCK_TIMEOUT = 10
+REBUILD_WAIT = 2.0
+REBUILD_POLL_INTERVAL = 0.05
+
+
+def _generation_key(model):
+    return f"generation:{model._meta.label_lower}"
+
+
+def generations(*models):
+    """
+    Return the current generation of each model.
+
+    A generation is an opaque value that changes every time a row of the
+    model is saved or deleted. Missing generations are started lazily.
+    """
+    keys = [_generation_key(model) for model in models]
+    current = cache.get_many(keys)
+
+    for key in keys:
+        if key not in current:
+            # Keep the value another request may have just stored. Caches
+            # that store nothing, like DummyCache, get a new value each time.
+            started = uuid.uuid4().hex
+            cache.add(key, started, None)
+            current[key] = cache.get(key, started)
+
+    return [current[key] for key in keys]
+
+
+def bump_generation(model):
+    """
+    Give a model a new generation, so responses built from it are rebuilt.
+
+    New generations are random rather than incremented, so concurrent bumps
+    can't collapse into one on cache backends without an atomic incr. The
+    generation is bumped again once the transaction commits, so a response
+    cached from data read before the commit is never reused afterwards, and
+    again once read replicas have caught up.
+    """
+    key = _generation_key(model)
+
+    def bump():
+        cache.set(key, uuid.uuid4().hex, None)
+
+    bump()
+    transaction.on_commit(bump)
+    after_replication(bump)
+
+
+def _response_key(request, view, kwargs, models):
+    parts = [
+        request.build_absolute_uri("/"),
+        type(view).__name__,
+        view.action or "",
+        str(request.user.pk),
+        repr(sorted(kwargs.items())),
+        repr(sorted(request.query_params.lists())),
+        *generations(*models),
+    ]
+    digest = hashlib.md5("\n".join(parts).encode()).hexdigest()
+    return f"response:{digest}"
+
+
+def cached_response(*models, timeout=RESPONSE_CACHE_TIMEOUT):
+    """
+    Cache a viewset GET handler's successful responses per viewer and params.
+
+    models lists every model the response is built from. Saving or deleting
+    any of them, see wishapi.signals, changes the cache key, so stale
+    responses are never served. Bulk writes that skip signals must call
+    bump_generation themselves.
+    """
+
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            key = _response_key(request, view, kwargs, models)
+            cached = cache.get(key)
+            if cached is not None:
+                return Response(cached)
+
+            lock_key = f"{key}:lock"
+            locked = cache.add(lock_key, True, REBUILD_LOCK_TIMEOUT)
+            if not locked:
+                # Another request is already building this response
+                deadline = time.monotonic() + REBUILD_WAIT
+                while time.monotonic() < deadline:
+                    time.sleep(REBUILD_POLL_INTERVAL)
+                    cached = cache.get(key)
+                    if cached is not None:
+                        return Response(cached)
+
+            try:
+                response = handler(view, request, *args, **kwargs)
+                if isinstance(response, Response) and response.status_code == 200:
+                    cache.set(key, response.data, timeout)
+            finally:
+                if locked:
+                    cache.delete(lock_key)
+
+            return response
+
+        return wrapper
+
+    return decorator
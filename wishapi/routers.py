@@ -0,0 +1,191 @@
+import contextvars
+import hashlib
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+logger = logging.getLogger(__name__)
+
+# Requests are only routed to replicas while the middleware allows it, so
+# management commands, the shell and background threads use the primary
+_routing = contextvars.ContextVar("replica_routing", default=None)
+
+
+class _Routing:
+    def __init__(self, use_replicas):
+        self.use_replicas = use_replicas
+
+
+def replicas():
+    """Aliases of the read replicas in use"""
+    return list(getattr(settings, "DATABASE_REPLICAS", []))
+
+
+def pin_to_primary():
+    """Send the rest of the current request's reads to the primary"""
+    routing = _routing.get()
+    if routing is not None:
+        routing.use_replicas = False
+
+
+class _DelayedCallbacks:
+    """
+    Run callbacks after a delay on one worker thread per process, so a
+    burst of writes doesn't start a thread per invalidation
+    """
+
+    def __init__(self):
+        self._pending = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def schedule(self, delay, callback):
+        with self._condition:
+            due = time.monotonic() + delay
+            heapq.heappush(self._pending, (due, next(self._sequence), callback))
+            # Also restarts the worker in processes forked after it started
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="after-replication", daemon=True
+                )
+                self._thread.start()
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                wait = self._pending[0][0] - time.monotonic()
+                if wait > 0:
+                    self._condition.wait(wait)
+                    continue
+                _, _, callback = heapq.heappop(self._pending)
+
+            try:
+                callback()
+            except Exception:
+                logger.exception("Delayed invalidation failed")
+
+
+_delayed = _DelayedCallbacks()
+
+
+def after_replication(callback):
+    """
+    Run callback again once replicas have caught up with this transaction.
+
+    Cache invalidation runs when data changes, but a request reading a
+    replica that still has the old rows could cache them again afterwards.
+    Repeating the invalidation after REPLICA_LAG drops such entries.
+    """
+    if not replicas():
+        return
+
+    transaction.on_commit(lambda: _delayed.schedule(settings.REPLICA_LAG, callback))
+
+
+class PrimaryReplicaRouter:
+    """
+    Send writes to the primary and, inside requests that allow it, reads to
+    a random replica from settings.DATABASE_REPLICAS.
+    """
+
+    def db_for_read(self, model, **hints):
+        routing = _routing.get()
+        aliases = replicas()
+        if routing is None or not routing.use_replicas or not aliases:
+            return DEFAULT_DB_ALIAS
+        return random.choice(aliases)
+
+    def db_for_write(self, model, **hints):
+        # Reads after a write must see it, so they stay on the primary too
+        pin_to_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *replicas()}
+        return obj1._state.db in aliases and obj2._state.db in aliases
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary
+        return db not in replicas()
+
+
+def _client_key(request):
+    client = request.headers.get("Authorization") or request.COOKIES.get(
+        settings.SESSION_COOKIE_NAME
+    )
+    if not client:
+        return None
+    return "primary_until:" + hashlib.md5(client.encode()).hexdigest()
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Let safe-method requests read from replicas.
+
+    Clients that wrote in the last REPLICA_LAG seconds, identified by their
+    Authorization header or session cookie, keep reading the primary so they
+    see their own writes. Works under both WSGI and ASGI, so async views are
+    not pushed onto a thread by this middleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        if not replicas():
+            return self.get_response(request)
+
+        key = _client_key(request)
+        safe = request.method in ("GET", "HEAD", "OPTIONS")
+        recently_wrote = safe and key is not None and cache.get(key) is not None
+
+        token = _routing.set(_Routing(safe and not recently_wrote))
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+
+        if not safe and key is not None:
+            cache.set(key, True, settings.REPLICA_LAG)
+
+        return response
+
+    async def __acall__(self, request):
+        if not replicas():
+            return await self.get_response(request)
+
+        key = _client_key(request)
+        safe = request.method in ("GET", "HEAD", "OPTIONS")
+        recently_wrote = (
+            safe and key is not None and await cache.aget(key) is not None
+        )
+
+        token = _routing.set(_Routing(safe and not recently_wrote))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _routing.reset(token)
+
+        if not safe and key is not None:
+            await cache.aset(key, True, settings.REPLICA_LAG)
+
+        return response
@@ -0,0 +1,23 @@
+from .friendships import friend_ids, invalidate_friend_ids
+from .feed import (
+    publish_wishlist,
+    retract_wishlist,
+    connect_feeds,
+    disconnect_feeds,
+    feed_for,
+)
+from .events import events_between, next_events, invalidate_next_events
+from .search import search, missing_search_triggers, rebuild_search_indexes
+from .priorities import (
+    all_priorities,
+    get_priority,
+    find_priority,
+    priority_name,
+    priority_ids,
+    reset_priorities,
+)
+from .thumbnails import (
+    smallest_image,
+    schedule_thumbnails,
+    wait_for_thumbnails,
+)
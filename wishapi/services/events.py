@@ -0,0 +1,71 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from wishapi.models import Wishlist
+from wishapi.routers import after_replication
+from .friendships import friend_ids
+
+# How many upcoming events are kept in each user's cached "next events" list
+NEXT_EVENTS_CACHED = 50
+NEXT_EVENTS_TIMEOUT = 60 * 60
+
+
+def _cache_key(user_id):
+    return f"next_events:{user_id}"
+
+
+def events_between(user_id, start, end=None):
+    """
+    A user's own wishlists and friends' public wishlists with an event in
+    the window, soonest first.
+
+    Both branches are covered by the (user, private, date_of_event) index.
+    """
+    events = Wishlist.objects.filter(
+        Q(user_id=user_id) | Q(user_id__in=friend_ids(user_id), private=False),
+        date_of_event__gte=start,
+    )
+    if end is not None:
+        events = events.filter(date_of_event__lte=end)
+
+    return events.select_related("user").order_by("date_of_event", "id")
+
+
+def next_events(user_id, limit, serialize):
+    """
+    Return the serialized next `limit` events from now, cached per user.
+
+    serialize turns a list of wishlists into a list of event dicts. Events
+    that have passed since the list was cached are dropped on read; the
+    list is rebuilt once too few remain to satisfy the limit.
+    """
+    now = timezone.now()
+    cached = cache.get(_cache_key(user_id))
+
+    if cached is not None:
+        size, events = cached
+        upcoming = [(date, event) for date, event in events if date >= now]
+        # A short list means every upcoming event was already cached
+        if len(upcoming) >= limit or len(events) < size:
+            return [event for _, event in upcoming[:limit]]
+
+    size = max(limit, NEXT_EVENTS_CACHED)
+    wishlists = list(events_between(user_id, now)[:size])
+    events = list(zip([w.date_of_event for w in wishlists], serialize(wishlists)))
+    cache.set(_cache_key(user_id), (size, events), NEXT_EVENTS_TIMEOUT)
+
+    return [event for _, event in events[:limit]]
+
+
+def invalidate_next_events(*user_ids):
+    """Drop cached upcoming events after a wishlist or friendship change"""
+    keys = [_cache_key(user_id) for user_id in user_ids]
+
+    def invalidate():
+        cache.delete_many(keys)
+
+    # Again on commit, in case a reader cached the old rows in between
+    invalidate()
+    transaction.on_commit(invalidate)
+    after_replication(invalidate)
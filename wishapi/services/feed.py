@@ -0,0 +1,76 @@
+from datetime import timedelta
+from django.db.models import Q
+from django.utils import timezone
+from wishapi.models import FeedEntry, Wishlist
+from .friendships import friend_ids
+
+# Feed entries older than this are no longer shown and are pruned on write
+FEED_RETENTION = timedelta(weeks=2)
+
+
+def _cutoff():
+    return timezone.now() - FEED_RETENTION
+
+
+def _prune(user_ids):
+    FeedEntry.objects.filter(user_id__in=user_ids, created__lt=_cutoff()).delete()
+
+
+def publish_wishlist(wishlist, created=None):
+    """
+    Push a public wishlist into the feed of each of the owner's friends.
+
+    created defaults to now, so a list that was just made public shows up
+    at the top of the feed; pass the creation date for new lists.
+    """
+    if wishlist.private:
+        return
+
+    created = created or timezone.now()
+    recipients = friend_ids(wishlist.user_id)
+    FeedEntry.objects.bulk_create(
+        [
+            FeedEntry(user_id=user_id, wishlist=wishlist, created=created)
+            for user_id in recipients
+        ],
+        ignore_conflicts=True,
+    )
+    _prune(recipients)
+
+
+def retract_wishlist(wishlist):
+    """Remove a wishlist that was deleted or made private from every feed"""
+    FeedEntry.objects.filter(wishlist=wishlist).delete()
+
+
+def connect_feeds(user1_id, user2_id):
+    """Give two new friends each other's recent public wishlists"""
+    recent_wishlists = Wishlist.objects.filter(
+        user_id__in=(user1_id, user2_id),
+        private=False,
+        creation_date__gte=_cutoff(),
+    )
+    FeedEntry.objects.bulk_create(
+        [
+            FeedEntry(
+                user_id=user1_id if wishlist.user_id == user2_id else user2_id,
+                wishlist=wishlist,
+                created=wishlist.creation_date,
+            )
+            for wishlist in recent_wishlists
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def disconnect_feeds(user1_id, user2_id):
+    """Remove two former friends' wishlists from each other's feeds"""
+    FeedEntry.objects.filter(
+        Q(user_id=user1_id, wishlist__user_id=user2_id)
+        | Q(user_id=user2_id, wishlist__user_id=user1_id)
+    ).delete()
+
+
+def feed_for(user_id):
+    """A user's feed entries still within the retention window, newest first"""
+    return FeedEntry.objects.filter(user_id=user_id, created__gte=_cutoff())
@@ -0,0 +1,47 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from wishapi.models import Friend
+from wishapi.routers import after_replication
+
+# Friend id sets only change through FriendViewSet, which invalidates them
+FRIEND_IDS_TIMEOUT = 60 * 60
+
+
+def _cache_key(user_id):
+    return f"friend_ids:{user_id}"
+
+
+def friend_ids(user_id):
+    """
+    Return the ids of a user's accepted friends as a set.
+
+    Friendships are stored once per pair, so both sides of the Friend table
+    are read (each side is covered by a (user, accepted) index) and the
+    result is cached per user.
+    """
+    ids = cache.get(_cache_key(user_id))
+    if ids is None:
+        pairs = Friend.objects.filter(
+            Q(user1_id=user_id) | Q(user2_id=user_id), accepted=True
+        ).values_list("user1_id", "user2_id")
+        ids = {
+            user2_id if user1_id == user_id else user1_id
+            for user1_id, user2_id in pairs
+        }
+        cache.set(_cache_key(user_id), ids, FRIEND_IDS_TIMEOUT)
+
+    return ids
+
+
+def invalidate_friend_ids(*user_ids):
+    """Drop the cached friend id sets of every user in a changed friendship"""
+    keys = [_cache_key(user_id) for user_id in user_ids]
+
+    def invalidate():
+        cache.delete_many(keys)
+
+    # Again on commit, in case a reader cached the old rows in between
+    invalidate()
+    transaction.on_commit(invalidate)
+    after_replication(invalidate)
@@ -0,0 +1,86 @@
+import threading
+import time
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from wishapi.models import Priority
+from wishapi.response_cache import generations
+
+# Priorities are a tiny lookup table that only changes through the admin, so
+# each process keeps them in memory. Saves and deletes reset the registry of
+# the process that made them. Other processes reload it once the Priority
+# generation changes, which is only checked once per interval, so a list of
+# items doesn't cost a cache round-trip per item.
+PRIORITY_CHECK_INTERVAL = 5
+
+_lock = threading.Lock()
+_registry = None
+
+
+def _priorities():
+    global _registry
+
+    registry = _registry
+    now = time.monotonic()
+    if registry is not None and now < registry[1]:
+        return registry[2]
+
+    (generation,) = generations(Priority)
+    if registry is None or registry[0] != generation:
+        with _lock:
+            priorities = {priority.pk: priority for priority in Priority.objects.all()}
+            registry = (generation, now + PRIORITY_CHECK_INTERVAL, priorities)
+    else:
+        registry = (generation, now + PRIORITY_CHECK_INTERVAL, registry[2])
+    _registry = registry
+
+    return registry[2]
+
+
+@receiver([post_save, post_delete], sender=Priority)
+def reset_priorities(sender=None, **kwargs):
+    """Reload priorities on the next lookup"""
+
+    def reset():
+        global _registry
+        _registry = None
+
+    reset()
+    transaction.on_commit(reset)
+
+
+def all_priorities():
+    """Every priority, ordered by id"""
+    return sorted(_priorities().values(), key=lambda priority: priority.pk)
+
+
+def get_priority(pk):
+    """Look up a priority by id, raising Priority.DoesNotExist like a query"""
+    try:
+        return _priorities()[int(pk)]
+    except (KeyError, TypeError, ValueError):
+        raise Priority.DoesNotExist(f"Priority {pk!r} does not exist")
+
+
+def priority_name(pk):
+    priority = _priorities().get(pk)
+    return priority.name if priority else None
+
+
+def priority_ids(name):
+    """Ids of the priorities with a name, for filtering without a join"""
+    return [pk for pk, priority in _priorities().items() if priority.name == name]
+
+
+def find_priority(value):
+    """Look up a priority by id or case-insensitive name, as given in imports"""
+    try:
+        return get_priority(value)
+    except Priority.DoesNotExist:
+        pass
+
+    name = str(value).strip().casefold()
+    for priority in _priorities().values():
+        if priority.name.casefold() == name:
+            return priority
+    raise Priority.DoesNotExist(f"Priority {value!r} does not exist")
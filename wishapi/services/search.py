@@ -0,0 +1,156 @@
+import re
+from django.db import connection, transaction
+from django.contrib.auth.models import User
+from django.db.models import FloatField, Q, Value
+from wishapi.models import Wishlist, WishlistItem
+
+# Full-text index and indexed columns for each searchable model, see the
+# 0006_search_index and 0007_user_search_index migrations. The indexes are
+# kept in sync by triggers, which SQLite drops whenever a migration rebuilds
+# the model's table; rebuild_search_indexes restores them.
+SEARCH_INDEXES = {
+    Wishlist: ("wishapi_wishlist_search", ("title", "description")),
+    WishlistItem: ("wishapi_wishlistitem_search", ("name", "note")),
+    User: ("wishapi_user_search", ("first_name", "last_name", "username")),
+}
+
+
+def _terms(text):
+    return re.findall(r"\w+", text)
+
+
+def _match_query(terms):
+    """Build an FTS5 query matching every term as a word prefix"""
+    return " ".join('"{}"*'.format(term) for term in terms)
+
+
+def search(queryset, text):
+    """
+    Filter a Wishlist, WishlistItem or User queryset to rows matching every
+    word in text, where each word may be the start of a longer one.
+
+    Rows are annotated with search_rank, lower being a better match, so
+    callers can order by it. The match is answered by the model's FTS5
+    index on SQLite and by LIKE filters elsewhere. The match is raw SQL
+    against the model's table, so evaluate the result rather than nesting
+    it in another query as a subquery.
+    """
+    terms = _terms(text)
+    unranked = Value(0.0, output_field=FloatField())
+    if not terms:
+        return queryset.annotate(search_rank=unranked).none()
+
+    index, columns = SEARCH_INDEXES[queryset.model]
+
+    if connection.vendor != "sqlite":
+        for term in terms:
+            matches = Q()
+            for column in columns:
+                matches |= Q(**{f"{column}__icontains": term})
+            queryset = queryset.filter(matches)
+        return queryset.annotate(search_rank=unranked)
+
+    table = queryset.model._meta.db_table
+    return queryset.extra(
+        select={"search_rank": f"{index}.rank"},
+        tables=[index],
+        where=[f"{index}.rowid = {table}.id", f"{index} MATCH %s"],
+        params=[_match_query(terms)],
+    )
+
+
+def _soft_deletes(model):
+    return any(field.name == "deleted" for field in model._meta.fields)
+
+
+def _trigger_sql(model, index, columns):
+    """The statements creating an index's triggers, like the migrations do"""
+    table = model._meta.db_table
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    changed = " OR ".join(f"old.{column} IS NOT new.{column}" for column in columns)
+
+    # Soft deleted rows leave the index, and re-enter it when restored
+    if _soft_deletes(model):
+        new_live, old_live = "new.deleted IS NULL", "old.deleted IS NULL"
+        changed += f" OR ({old_live}) IS NOT ({new_live})"
+    else:
+        new_live = old_live = "1"
+
+    return {
+        f"{index}_insert": f"""
+            CREATE TRIGGER {index}_insert AFTER INSERT ON {table}
+            WHEN {new_live}
+            BEGIN
+                INSERT INTO {index}(rowid, {column_list})
+                VALUES (new.id, {new_values});
+            END
+        """,
+        f"{index}_delete": f"""
+            CREATE TRIGGER {index}_delete AFTER DELETE ON {table}
+            WHEN {old_live}
+            BEGIN
+                INSERT INTO {index}({index}, rowid, {column_list})
+                VALUES ('delete', old.id, {old_values});
+            END
+        """,
+        f"{index}_update": f"""
+            CREATE TRIGGER {index}_update AFTER UPDATE ON {table}
+            WHEN {changed}
+            BEGIN
+                INSERT INTO {index}({index}, rowid, {column_list})
+                SELECT 'delete', old.id, {old_values} WHERE {old_live};
+                INSERT INTO {index}(rowid, {column_list})
+                SELECT new.id, {new_values} WHERE {new_live};
+            END
+        """,
+    }
+
+
+def _schema_names(cursor, kind):
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = %s", [kind])
+    return {name for (name,) in cursor.fetchall()}
+
+
+def missing_search_triggers(using=connection):
+    """
+    Names of the sync triggers missing from full-text indexes that exist.
+
+    Indexes whose migration hasn't run yet are not reported.
+    """
+    if using.vendor != "sqlite":
+        return []
+
+    with using.cursor() as cursor:
+        tables = _schema_names(cursor, "table")
+        triggers = _schema_names(cursor, "trigger")
+
+    return [
+        trigger
+        for model, (index, columns) in SEARCH_INDEXES.items()
+        if index in tables
+        for trigger in _trigger_sql(model, index, columns)
+        if trigger not in triggers
+    ]
+
+
+def rebuild_search_indexes(using=connection):
+    """Recreate every full-text index's triggers and refill it from its table"""
+    if using.vendor != "sqlite":
+        return
+
+    with transaction.atomic(using=using.alias), using.cursor() as cursor:
+        for model, (index, columns) in SEARCH_INDEXES.items():
+            table = model._meta.db_table
+            column_list = ", ".join(columns)
+            for trigger, sql in _trigger_sql(model, index, columns).items():
+                cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+                cursor.execute(sql)
+
+            where = "WHERE deleted IS NULL" if _soft_deletes(model) else ""
+            cursor.execute(f"INSERT INTO {index}({index}) VALUES ('delete-all')")
+            cursor.execute(
+                f"INSERT INTO {index}(rowid, {column_list}) "
+                f"SELECT id, {column_list} FROM {table} {where}"
+            )
@@ -0,0 +1,114 @@
+import io
+import logging
+import os
+import threading
+from concurrent import futures
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from PIL import Image, ImageOps
+from wishapi.models import Profile
+from wishapi.response_cache import bump_generation
+from wishapi.signals import bump_profile_versions
+
+logger = logging.getLogger(__name__)
+
+# Longest edge in pixels of each resized copy of a profile image
+THUMBNAIL_SIZES = (64, 160, 320)
+THUMBNAIL_WORKERS = 2
+
+# Resizing runs on a small pool of background threads so uploads return as
+# soon as the original is stored
+_executor = futures.ThreadPoolExecutor(
+    max_workers=THUMBNAIL_WORKERS, thread_name_prefix="thumbnails"
+)
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def thumbnail_name(name, size):
+    """Storage name of the resized copy of image name with a longest edge of size"""
+    stem, ext = os.path.splitext(os.path.basename(name))
+    return f"profile/thumbnails/{stem}-{size}{ext}"
+
+
+def smallest_image(profile):
+    """Storage name of the smallest copy of a profile's image, or None"""
+    if profile is None or not profile.image:
+        return None
+
+    if profile.thumbnails:
+        return profile.thumbnails[str(min(map(int, profile.thumbnails)))]
+
+    # Thumbnails are still being made, or the image predates them
+    return profile.image.name
+
+
+def make_thumbnails(profile_id, name):
+    """
+    Store resized copies of image name and record them on the profile.
+
+    The profile is only updated while it still shows name, so a worker
+    that loses a race with a newer upload discards its work, leaving the
+    files to collect_media.
+    """
+    with default_storage.open(name) as original:
+        image = Image.open(original)
+        image_format = image.format
+        image = ImageOps.exif_transpose(image)
+
+        thumbnails = {}
+        for size in THUMBNAIL_SIZES:
+            resized = image.copy()
+            resized.thumbnail((size, size))
+            if image_format == "JPEG" and resized.mode not in ("RGB", "L"):
+                resized = resized.convert("RGB")
+
+            buffer = io.BytesIO()
+            resized.save(buffer, format=image_format)
+            thumbnails[str(size)] = default_storage.save(
+                thumbnail_name(name, size), ContentFile(buffer.getvalue())
+            )
+
+    updated = Profile.objects.filter(pk=profile_id, image=name).update(
+        thumbnails=thumbnails
+    )
+    if not updated:
+        return
+
+    # update() skips the signals that invalidate cached profiles
+    bump_generation(Profile)
+    bump_profile_versions(Profile, Profile.objects.get(pk=profile_id))
+
+
+def _run(profile_id, name):
+    try:
+        make_thumbnails(profile_id, name)
+    except Exception:
+        logger.exception("Could not make thumbnails of %s", name)
+    finally:
+        connection.close()
+
+
+def schedule_thumbnails(profile):
+    """Resize a profile's image in the background once the transaction commits"""
+
+    def submit():
+        future = _executor.submit(_run, profile.pk, profile.image.name)
+        with _pending_lock:
+            _pending.add(future)
+        future.add_done_callback(_finished)
+
+    transaction.on_commit(submit)
+
+
+def _finished(future):
+    with _pending_lock:
+        _pending.discard(future)
+
+
+def wait_for_thumbnails(timeout=None):
+    """Block until every scheduled resize has finished"""
+    with _pending_lock:
+        pending = list(_pending)
+    futures.wait(pending, timeout=timeout)
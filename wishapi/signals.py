@@ -0,0 +1,123 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.backends.signals import connection_created
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from wishapi.authentication import token_cache
+from wishapi.conditional import bump_versions
+from wishapi.models import (
+    Friend,
+    Pin,
+    Priority,
+    Profile,
+    Purchase,
+    Wishlist,
+    WishlistItem,
+)
+from wishapi.response_cache import bump_generation
+from wishapi.routers import after_replication
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """Apply settings.SQLITE_PRAGMAS to each new SQLite connection"""
+    if connection.vendor != "sqlite":
+        return
+
+    with connection.cursor() as cursor:
+        for pragma, value in getattr(settings, "SQLITE_PRAGMAS", {}).items():
+            # In-memory databases, like the test database, can't use WAL
+            if pragma == "journal_mode" and connection.is_in_memory_db():
+                continue
+            cursor.execute(f"PRAGMA {pragma} = {value}")
+
+
+@receiver([post_save, post_delete], sender=Token)
+def invalidate_cached_token(sender, instance, **kwargs):
+    def invalidate():
+        token_cache.invalidate(key=instance.key, user_id=instance.user_id)
+
+    invalidate()
+    after_replication(invalidate)
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    def invalidate():
+        token_cache.invalidate(user_id=instance.pk)
+
+    invalidate()
+    after_replication(invalidate)
+
+
+# Models that cached responses are built from, see wishapi.response_cache
+CACHED_MODELS = (Wishlist, WishlistItem, Purchase, Friend, Pin, Profile, Priority, User)
+
+
+def invalidate_cached_responses(sender, **kwargs):
+    bump_generation(sender)
+
+
+for model in CACHED_MODELS:
+    post_save.connect(invalidate_cached_responses, sender=model)
+    post_delete.connect(invalidate_cached_responses, sender=model)
+
+
+# Per-resource versions behind the ETags of wishlists and profiles, see
+# wishapi.conditional. A wishlist's version covers its items and their
+# purchases; a user's "wishlists" version covers all of their wishlists.
+@receiver([post_save, post_delete], sender=Wishlist)
+def bump_wishlist_versions(sender, instance, **kwargs):
+    bump_versions("wishlist", instance.pk)
+    bump_versions("wishlists", instance.user_id)
+    bump_versions("profile", instance.user_id)
+
+
+def _bump_item_versions(wishlist_id, user_id):
+    bump_versions("wishlist", wishlist_id)
+    bump_versions("wishlists", user_id)
+
+
+@receiver([post_save, post_delete], sender=WishlistItem)
+def bump_item_versions(sender, instance, **kwargs):
+    user_id = (
+        Wishlist.all_objects.filter(pk=instance.wishlist_id)
+        .values_list("user_id", flat=True)
+        .first()
+    )
+    _bump_item_versions(instance.wishlist_id, user_id)
+
+
+@receiver([post_save, post_delete], sender=Purchase)
+def bump_purchase_versions(sender, instance, **kwargs):
+    # Purchases change the remaining quantity shown with each item
+    item = (
+        WishlistItem.all_objects.filter(pk=instance.wishlist_item_id)
+        .values("wishlist_id", "wishlist__user_id")
+        .first()
+    )
+    if item is not None:
+        _bump_item_versions(item["wishlist_id"], item["wishlist__user_id"])
+
+
+@receiver([post_save, post_delete], sender=Friend)
+def bump_friend_versions(sender, instance, **kwargs):
+    bump_versions("profile", instance.user1_id, instance.user2_id)
+
+
+@receiver([post_save, post_delete], sender=Pin)
+def bump_pin_versions(sender, instance, **kwargs):
+    bump_versions("profile", instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=Profile)
+def bump_profile_versions(sender, instance, **kwargs):
+    # Profile images are shown in the friend lists and requests of others
+    pairs = Friend.objects.filter(
+        Q(user1_id=instance.user_id) | Q(user2_id=instance.user_id)
+    ).values_list("user1_id", "user2_id")
+    bump_versions(
+        "profile", instance.user_id, *{user_id for pair in pairs for user_id in pair}
+    )
@@ -0,0 +1,37 @@
+import hashlib
+import os
+import posixpath
+from django.core.files.storage import FileSystemStorage
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage that names files by the SHA-256 of their content.
+
+    A file saved as "profile/photo.jpeg" is stored as
+    "profile/ab/cd/abcd....jpeg", so directories stay small and identical
+    uploads share one file. Because files are shared, callers must not
+    delete them; unreferenced files are removed by the collect_media
+    command instead.
+    """
+
+    def _save(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content_hash = digest.hexdigest()
+
+        directory, filename = posixpath.split(name)
+        ext = os.path.splitext(filename)[1].lower()
+        name = posixpath.join(
+            directory, content_hash[:2], content_hash[2:4], f"{content_hash}{ext}"
+        )
+
+        if self.exists(name):
+            # Refresh the mtime so collect_media treats the file as new
+            os.utime(self.path(name))
+            return name
+
+        # Two identical uploads racing here both store a file, the loser
+        # under a suffixed name, which is harmless
+        return super()._save(name, content)
@@ -0,0 +1,35 @@
+import io
+import shutil
+import tempfile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+
+def client_for(user_id):
+    """An API client authenticated with the user's token"""
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f"Token {Token.objects.get(user_id=user_id).key}"
+    )
+    return client
+
+
+def image_file(name="avatar.png", size=(800, 600), image_format="PNG"):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, "teal").save(buffer, format=image_format)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+class MediaRootMixin:
+    """Store media files in a temporary directory for each test"""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings = override_settings(MEDIA_ROOT=self.media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
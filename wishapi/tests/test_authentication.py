@@ -0,0 +1,90 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from wishapi.authentication import TokenCache, token_cache
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    fixtures = ["users", "tokens"]
+
+    def setUp(self):
+        token_cache.clear()
+        self.token = Token.objects.get(user_id=1)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def get_priorities(self):
+        return self.client.get("/priorities")
+
+    def test_repeat_requests_skip_the_token_query(self):
+        self.assertEqual(self.get_priorities().status_code, 200)
+        with self.assertNumQueries(0):  # priorities come from the registry
+            self.assertEqual(self.get_priorities().status_code, 200)
+        self.assertEqual(token_cache.stats()["hit_rate"], 0.5)
+
+    def test_deleted_token_is_rejected(self):
+        self.get_priorities()
+        self.token.delete()
+        self.assertEqual(self.get_priorities().status_code, 401)
+
+    def test_deactivated_user_is_rejected(self):
+        self.get_priorities()
+        user = User.objects.get(pk=1)
+        user.is_active = False
+        user.save()
+        self.assertEqual(self.get_priorities().status_code, 401)
+
+    def test_invalid_tokens_are_not_cached(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token not-a-token")
+        self.assertEqual(self.get_priorities().status_code, 401)
+        self.assertEqual(token_cache.stats()["size"], 0)
+
+    def test_requests_get_their_own_user_instance(self):
+        self.get_priorities()
+        first, _ = token_cache.get(self.token.key)
+        first.first_name = "Changed"
+        second, token = token_cache.get(self.token.key)
+        self.assertEqual(second.first_name, "Ryan")
+        self.assertIs(token.user, second)
+
+
+class TokenCacheTests(TestCase):
+    fixtures = ["users", "tokens"]
+
+    def setUp(self):
+        self.now = 0
+        self.cache = TokenCache(maxsize=2, timeout=60, clock=lambda: self.now)
+        self.tokens = list(Token.objects.select_related("user").order_by("user_id"))
+
+    def put(self, token):
+        self.cache.set(token.key, token.user, token)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        first, second, third = self.tokens[:3]
+        self.put(first)
+        self.put(second)
+        self.cache.get(first.key)
+        self.put(third)
+
+        self.assertIsNotNone(self.cache.get(first.key))
+        self.assertIsNone(self.cache.get(second.key))
+        self.assertIsNotNone(self.cache.get(third.key))
+
+    def test_entries_expire(self):
+        self.put(self.tokens[0])
+        self.now = 61
+        self.assertIsNone(self.cache.get(self.tokens[0].key))
+        self.assertEqual(self.cache.stats()["size"], 0)
+
+    def test_invalidate_by_user(self):
+        self.put(self.tokens[0])
+        self.put(self.tokens[1])
+        self.cache.invalidate(user_id=self.tokens[0].user_id)
+
+        self.assertIsNone(self.cache.get(self.tokens[0].key))
+        self.assertIsNotNone(self.cache.get(self.tokens[1].key))
+        self.assertEqual(
+            self.cache.stats(),
+            {"hits": 1, "misses": 1, "hit_rate": 0.5, "size": 1},
+        )
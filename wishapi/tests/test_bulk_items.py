@@ -0,0 +1,158 @@
+import json
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from wishapi.authentication import token_cache
+from wishapi.models import WishlistItem
+from wishapi.services import get_priority
+from wishapi.views.wishlist_items import BULK_IMPORT_MAX_SIZE, read_import_file
+
+
+class BulkWishlistItemTests(TestCase):
+    fixtures = ["users", "tokens", "priorities", "wishlists", "wishlist_items"]
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.get(user_id=1).key}"
+        )
+
+    def test_creates_items_in_one_insert(self):
+        items = [
+            {"name": f"Registry item {number}", "quantity": 2, "priority": 3}
+            for number in range(40)
+        ]
+        items[0].update(priority="must-have", note="Blue", website_url=None)
+
+        # Warm the token and priority caches, as between real requests
+        self.client.get("/priorities")
+        get_priority(1)
+        # The wishlist lookup, and the insert inside its transaction
+        with self.assertNumQueries(4):
+            response = self.client.post(
+                "/wishlist_items/bulk", {"wishlist": 1, "items": items}, format="json"
+            )
+
+        self.assertEqual(response.status_code, 201)
+        created = response.json()
+        self.assertEqual(len(created), 40)
+        self.assertEqual(created[0]["name"], "Registry item 0")
+        self.assertEqual(created[0]["priority"], 1)
+        self.assertEqual(created[0]["note"], "Blue")
+        self.assertEqual(created[1]["leftover_quantity"], 2)
+        self.assertEqual(
+            WishlistItem.objects.filter(
+                wishlist_id=1, name__startswith="Registry item"
+            ).count(),
+            40,
+        )
+
+    def test_created_items_show_in_cached_wishlists(self):
+        self.client.get("/wishlists/1")
+        self.client.post(
+            "/wishlist_items/bulk",
+            {"wishlist": 1, "items": [{"name": "Hammock"}]},
+            format="json",
+        )
+        names = [
+            item["name"]
+            for item in self.client.get("/wishlists/1").json()["wishlist_items"]
+        ]
+        self.assertIn("Hammock", names)
+
+    def test_reports_every_invalid_row_and_creates_nothing(self):
+        before = WishlistItem.objects.count()
+        response = self.client.post(
+            "/wishlist_items/bulk",
+            {
+                "wishlist": 1,
+                "items": [
+                    {"name": "Fine"},
+                    {"name": "No quantity", "quantity": 0},
+                    {"quantity": 1},
+                    {"name": "Odd priority", "priority": "Someday"},
+                ],
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()["errors"]
+        self.assertEqual([error["row"] for error in errors], [2, 3, 4])
+        self.assertIn("quantity", errors[0]["errors"])
+        self.assertIn("name", errors[1]["errors"])
+        self.assertEqual(
+            errors[2]["errors"], {"priority": ["Unknown priority 'Someday'"]}
+        )
+        self.assertEqual(WishlistItem.objects.count(), before)
+
+    def test_imports_csv_and_json_files(self):
+        csv_file = SimpleUploadedFile(
+            "registry.csv",
+            "name,quantity,website_url,note,priority\n"
+            "Toaster,1,https://example.com/toaster,,High Priority\n"
+            "Napkins,12,,Linen,\n".encode(),
+        )
+        response = self.client.post(
+            "/wishlist_items/bulk", {"wishlist": 1, "file": csv_file}
+        )
+        self.assertEqual(response.status_code, 201)
+        toaster, napkins = response.json()
+        self.assertEqual(toaster["priority"], 2)
+        self.assertEqual(toaster["website_url"], "https://example.com/toaster")
+        self.assertIsNone(toaster["note"])
+        self.assertEqual((napkins["quantity"], napkins["note"]), (12, "Linen"))
+        self.assertIsNone(napkins["priority"])
+
+        json_file = SimpleUploadedFile(
+            "registry.json", json.dumps({"items": [{"name": "Kettle"}]}).encode()
+        )
+        response = self.client.post(
+            "/wishlist_items/bulk", {"wishlist": 1, "file": json_file}
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()[0]["name"], "Kettle")
+
+        broken = SimpleUploadedFile("registry.json", b"[{")
+        response = self.client.post(
+            "/wishlist_items/bulk", {"wishlist": 1, "file": broken}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_rejects_oversized_files_before_reading(self):
+        content = b"name\n" + b"x" * BULK_IMPORT_MAX_SIZE
+        large = SimpleUploadedFile("registry.csv", content)
+        with self.assertRaisesMessage(ValueError, "at most"):
+            read_import_file(large)
+        self.assertEqual(large.tell(), 0)
+
+        response = self.client.post(
+            "/wishlist_items/bulk",
+            {"wishlist": 1, "file": SimpleUploadedFile("registry.csv", content)},
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_rejects_bodies_that_are_not_objects(self):
+        response = self.client.post(
+            "/wishlist_items/bulk", [{"name": "Kite"}], format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_only_the_owner_can_add_items(self):
+        response = self.client.post(
+            "/wishlist_items/bulk",
+            {"wishlist": 3, "items": [{"name": "Sneaky"}]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 403)
+
+        response = self.client.post(
+            "/wishlist_items/bulk",
+            {"wishlist": 999, "items": [{"name": "Lost"}]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,157 @@
+import threading
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from wishapi.authentication import token_cache
+from wishapi.models import Purchase, WishlistItem
+from wishapi.tests.helpers import client_for
+
+FIXTURES = ["users", "tokens", "priorities", "wishlists", "wishlist_items"]
+
+
+class CheckoutTests(TestCase):
+    fixtures = FIXTURES
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        WishlistItem.objects.filter(pk__in=[7, 8]).update(
+            quantity=4, purchased_quantity=1
+        )
+        self.client = client_for(1)
+
+    def checkout(self, *lines):
+        return self.client.post(
+            "/purchases/checkout", {"items": list(lines)}, format="json"
+        )
+
+    def test_purchases_every_item_at_once(self):
+        response = self.checkout(
+            {"wishlist_item": 8, "quantity": 2},
+            {"wishlist_item": 7},
+            {"wishlist_item": 8},
+        )
+
+        self.assertEqual(response.status_code, 201)
+        purchases = response.json()
+        self.assertEqual(
+            [(p["wishlist_item"]["id"], p["quantity"]) for p in purchases],
+            [(7, 1), (8, 3)],
+        )
+        self.assertEqual(purchases[0]["wishlist_item"]["wishlist"]["user"]["id"], 3)
+        self.assertEqual(
+            dict(
+                WishlistItem.objects.filter(pk__in=[7, 8]).values_list(
+                    "pk", "purchased_quantity"
+                )
+            ),
+            {7: 2, 8: 4},
+        )
+        self.assertEqual(Purchase.objects.filter(user_id=1).count(), 2)
+
+    def test_cached_wishlist_shows_new_quantities(self):
+        before = self.client.get("/wishlists/5").json()
+        self.checkout({"wishlist_item": 8, "quantity": 3})
+        after = self.client.get("/wishlists/5").json()
+
+        def leftover(wishlist):
+            return {
+                item["id"]: item["leftover_quantity"]
+                for item in wishlist["wishlist_items"]
+            }
+
+        self.assertEqual(leftover(before)[8], 3)
+        self.assertEqual(leftover(after)[8], 0)
+
+    def test_over_purchase_buys_nothing(self):
+        response = self.checkout(
+            {"wishlist_item": 7, "quantity": 1},
+            {"wishlist_item": 8, "quantity": 4},
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json()["errors"],
+            [
+                {
+                    "wishlist_item": 8,
+                    "remaining": 3,
+                    "reason": "Requested quantity exceeds the quantity remaining",
+                }
+            ],
+        )
+        self.assertFalse(Purchase.objects.filter(user_id=1).exists())
+        self.assertEqual(WishlistItem.objects.get(pk=7).purchased_quantity, 1)
+
+    def test_rejects_missing_items_and_bad_lines(self):
+        response = self.checkout({"wishlist_item": 7}, {"wishlist_item": 999})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {"missing": [999]})
+
+        for lines in (
+            [],
+            [{"quantity": 1}],
+            [{"wishlist_item": 7, "quantity": 0}],
+            [{"wishlist_item": "seven"}],
+            ["7"],
+        ):
+            with self.subTest(lines=lines):
+                self.assertEqual(self.checkout(*lines).status_code, 400)
+
+        # A bare list instead of an object holding the items
+        response = self.client.post(
+            "/purchases/checkout", [{"wishlist_item": 7}], format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Purchase.objects.filter(user_id=1).exists())
+
+
+class CheckoutContentionTests(TransactionTestCase):
+    fixtures = FIXTURES
+
+    def test_concurrent_buyers_never_over_purchase(self):
+        WishlistItem.objects.filter(pk__in=[7, 8]).update(
+            quantity=10, purchased_quantity=0
+        )
+        tokens = list(Token.objects.values_list("key", flat=True))
+        results = []
+        lock = threading.Lock()
+
+        def buyer(number):
+            client = APIClient()
+            client.credentials(
+                HTTP_AUTHORIZATION=f"Token {tokens[number % len(tokens)]}"
+            )
+            # Half the buyers list the items in the other order
+            lines = [{"wishlist_item": 7}, {"wishlist_item": 8}]
+            if number % 2:
+                lines.reverse()
+            try:
+                for _ in range(4):
+                    response = client.post(
+                        "/purchases/checkout", {"items": lines}, format="json"
+                    )
+                    with lock:
+                        results.append(response.status_code)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=buyer, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results.count(201), 10)
+        self.assertEqual(sorted(set(results)), [201, 400])
+        for item in WishlistItem.objects.filter(pk__in=[7, 8]):
+            self.assertEqual(item.purchased_quantity, 10)
+            self.assertEqual(
+                Purchase.objects.filter(wishlist_item=item).aggregate(
+                    total=Sum("quantity")
+                )["total"],
+                10,
+            )
@@ -0,0 +1,70 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from wishapi.authentication import token_cache
+from wishapi.models import Profile, Purchase, Wishlist, WishlistItem
+
+
+class ConditionalGetTests(TestCase):
+    fixtures = [
+        "users",
+        "tokens",
+        "priorities",
+        "wishlists",
+        "wishlist_items",
+        "friends",
+        "profiles",
+        "pins",
+    ]
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.get(user_id=1).key}"
+        )
+
+    def etag(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response["ETag"]
+
+    def test_unchanged_resource_is_not_modified(self):
+        tag = self.etag("/wishlists/1")
+        with self.assertNumQueries(0):
+            response = self.client.get("/wishlists/1", HTTP_IF_NONE_MATCH=tag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], tag)
+        self.assertEqual(response.content, b"")
+
+    def test_weak_and_listed_tags_match(self):
+        tag = self.etag("/profile")
+        response = self.client.get("/profile", HTTP_IF_NONE_MATCH=f'"other", W/{tag}')
+        self.assertEqual(response.status_code, 304)
+
+    def test_params_change_the_tag(self):
+        self.assertNotEqual(self.etag("/wishlists/1"), self.etag("/wishlists/1?q=port"))
+
+    def test_items_and_purchases_change_their_wishlist_tags(self):
+        tags = (self.etag("/wishlists/1"), self.etag("/wishlists"))
+        item = WishlistItem.objects.create(wishlist_id=1, name="Kite", priority_id=1)
+        self.assertNotEqual((self.etag("/wishlists/1"), self.etag("/wishlists")), tags)
+
+        tags = (self.etag("/wishlists/1"), self.etag("/wishlists"))
+        Purchase.objects.create(wishlist_item=item, user_id=2, quantity=1)
+        self.assertNotEqual((self.etag("/wishlists/1"), self.etag("/wishlists")), tags)
+
+    def test_other_resources_keep_their_tags(self):
+        tags = (self.etag("/wishlists/1"), self.etag("/wishlists"))
+        Wishlist.objects.filter(pk=3).get().save()  # another user's list
+        WishlistItem.objects.create(wishlist_id=2, name="Kite", priority_id=1)
+        self.assertEqual(self.etag("/wishlists/1"), tags[0])
+        self.assertNotEqual(self.etag("/wishlists"), tags[1])
+
+    def test_friend_profile_change_changes_profile_tag(self):
+        tag = self.etag("/profile")
+        Profile.objects.create(user_id=6, bio="New friend profile")
+        self.assertNotEqual(self.etag("/profile"), tag)
+        self.assertEqual(self.etag("/profile/4"), self.etag("/profile/4"))
@@ -0,0 +1,76 @@
+import threading
+from django.core.cache import cache
+from django.db import connection
+from django.test import TransactionTestCase
+from rest_framework.authtoken.models import Token
+from wishapi.authentication import token_cache
+from wishapi.views.dashboard import load_concurrently
+
+
+class AsyncDashboardTests(TransactionTestCase):
+    fixtures = [
+        "users",
+        "tokens",
+        "priorities",
+        "wishlists",
+        "friends",
+        "profiles",
+        "pins",
+    ]
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+
+    async def assertSameAsSync(self, async_url, sync_url, user_id):
+        token = await Token.objects.aget(user_id=user_id)
+        headers = {"Authorization": f"Token {token.key}"}
+        async_response = await self.async_client.get(async_url, headers=headers)
+        sync_response = await self.async_client.get(sync_url, headers=headers)
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        self.assertEqual(async_response.json(), sync_response.json())
+
+    async def test_dashboard_matches_sync_view(self):
+        for user_id in (1, 2, 3):
+            await self.assertSameAsSync("/async/profile", "/profile", user_id)
+        await self.assertSameAsSync("/async/profile?q=je", "/profile?q=je", 2)
+
+    async def test_profile_matches_sync_view(self):
+        for pk in (1, 2, 999):
+            await self.assertSameAsSync(f"/async/profile/{pk}", f"/profile/{pk}", 1)
+
+    async def test_authentication(self):
+        response = await self.async_client.get("/async/profile")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response["WWW-Authenticate"], "Token")
+
+        response = await self.async_client.get(
+            "/async/profile", headers={"Authorization": "Token invalid"}
+        )
+        self.assertEqual(response.json(), {"detail": "Invalid token."})
+
+        response = await self.async_client.get("/async/profile/2")
+        self.assertEqual(response.status_code, 200)
+
+    async def test_shares_etag_with_sync_view(self):
+        token = await Token.objects.aget(user_id=1)
+        headers = {"Authorization": f"Token {token.key}"}
+        sync_response = await self.async_client.get("/profile", headers=headers)
+
+        response = await self.async_client.get(
+            "/async/profile",
+            headers={**headers, "If-None-Match": sync_response["ETag"]},
+        )
+        self.assertEqual(response.status_code, 304)
+
+    async def test_queries_run_on_separate_connections(self):
+        barrier = threading.Barrier(3, timeout=5)
+
+        def load():
+            # Every loader must be running at once to pass the barrier
+            barrier.wait()
+            connection.ensure_connection()
+        return id(connection.connection)
+
+        loaded = await load_concurrently({name: load for name in "abc"})
+        self.assertEqual(len(set(loaded.values())), 3)
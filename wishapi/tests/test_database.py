@@ -0,0 +1,52 @@
+import os
+import shutil
+import tempfile
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import SimpleTestCase, override_settings
+
+
+class SQLitePragmaTests(SimpleTestCase):
+    databases = {"default"}
+
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_file_databases_use_wal_and_pragmas(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        settings_dict = {
+            **connection.settings_dict,
+            "NAME": os.path.join(directory, "db.sqlite3"),
+        }
+        wrapper = DatabaseWrapper(settings_dict, alias="pragmas")
+        self.addCleanup(wrapper.close)
+
+        with override_settings(
+            SQLITE_PRAGMAS={
+                "journal_mode": "WAL",
+                "synchronous": "NORMAL",
+                "busy_timeout": 1234,
+                "cache_size": -1000,
+            }
+        ):
+            wrapper.ensure_connection()
+
+        self.assertEqual(self.pragma(wrapper, "journal_mode"), "wal")
+        self.assertEqual(self.pragma(wrapper, "synchronous"), 1)
+        self.assertEqual(self.pragma(wrapper, "busy_timeout"), 1234)
+        self.assertEqual(self.pragma(wrapper, "cache_size"), -1000)
+
+    def test_test_database_is_configured_like_production(self):
+        self.assertEqual(self.pragma(connection, "journal_mode"), "wal")
+        self.assertEqual(self.pragma(connection, "busy_timeout"), 5000)
+
+    def test_in_memory_databases_keep_their_journal(self):
+        wrapper = DatabaseWrapper(
+            {**connection.settings_dict, "NAME": ":memory:"}, alias="memory"
+        )
+        self.addCleanup(wrapper.close)
+        wrapper.ensure_connection()
+        self.assertEqual(self.pragma(wrapper, "journal_mode"), "memory")
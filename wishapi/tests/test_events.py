@@ -0,0 +1,90 @@
+from datetime import timedelta
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from wishapi.models import Friend, Wishlist
+from wishapi.services import invalidate_next_events, next_events
+from wishapi.tests.helpers import client_for
+from wishapi.views.wishlists import serialize_events
+
+
+class UpcomingEventsTests(TestCase):
+    fixtures = ["users", "tokens", "wishlists", "friends"]
+
+    def setUp(self):
+        cache.clear()
+
+    def event_ids(self, user_id, query=""):
+        response = client_for(user_id).get(f"/upcoming_events{query}")
+        return [event["id"] for event in response.json()]
+
+    def create_event(self, user_id, days, private=False):
+        response = client_for(user_id).post(
+            "/wishlists",
+            {
+                "title": f"Event in {days} days",
+                "description": "Party",
+                "spoil_surprises": False,
+                "private": private,
+                "date_of_event": (timezone.now() + timedelta(days=days)).isoformat(),
+            },
+            format="json",
+        )
+        return response.json()["id"]
+
+    def test_past_events_are_excluded_by_default(self):
+        self.assertEqual(self.event_ids(1), [])
+
+    def test_window_returns_own_and_friends_public_events_in_order(self):
+        Wishlist.objects.filter(pk__in=[2, 17]).update(
+            date_of_event="2024-08-01T12:00:00Z"
+        )
+        events = self.event_ids(1, "?from=2024-01-01&to=2024-12-31")
+
+        wishlists = Wishlist.objects.in_bulk(events)
+        dates = [wishlists[wishlist_id].date_of_event for wishlist_id in events]
+        self.assertEqual(dates, sorted(dates))
+        self.assertIn(2, events)  # own private list
+        self.assertIn(3, events)  # friend's public list
+        self.assertNotIn(17, events)  # friend's private list
+        self.assertNotIn(8, events)  # stranger's public list
+
+    def test_date_only_end_includes_the_whole_day(self):
+        Wishlist.objects.filter(pk=2).update(date_of_event="2024-08-01T18:00:00Z")
+        self.assertIn(2, self.event_ids(1, "?from=2024-08-01&to=2024-08-01"))
+        self.assertNotIn(2, self.event_ids(1, "?from=2024-07-01&to=2024-07-31"))
+
+    def test_limit(self):
+        self.assertEqual(len(self.event_ids(1, "?from=2024-01-01&limit=2")), 2)
+
+    def test_invalid_date(self):
+        response = client_for(1).get("/upcoming_events?from=soon")
+        self.assertEqual(response.status_code, 400)
+
+    def test_cached_events_refresh_after_friend_creates_wishlist(self):
+        later = self.create_event(1, days=10)
+        self.assertEqual(self.event_ids(2), [later])
+
+        sooner = self.create_event(1, days=5)
+        self.create_event(1, days=1, private=True)
+        self.assertEqual(self.event_ids(2), [sooner, later])
+
+    def test_cached_events_refresh_after_unfriending(self):
+        self.create_event(1, days=10)
+        self.event_ids(2)
+
+        friendship = Friend.objects.get(user1_id=1, user2_id=2)
+        client_for(2).delete(f"/friends/{friendship.id}")
+
+        self.assertEqual(self.event_ids(2), [])
+
+    def test_invalidated_again_on_commit(self):
+        later = self.create_event(1, days=10)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate_next_events(2)
+            # A concurrent reader caches the old list before the commit
+            next_events(2, 20, serialize_events)
+            Wishlist.objects.filter(pk=later).delete()
+
+        self.assertEqual(self.event_ids(2), [])
@@ -0,0 +1,76 @@
+from django.core.cache import cache
+from django.test import TestCase
+from wishapi.models import Friend, Wishlist
+from wishapi.tests.helpers import client_for
+
+
+class FeedTests(TestCase):
+    fixtures = ["users", "tokens", "friends"]
+
+    def setUp(self):
+        cache.clear()
+
+    def create_wishlist(self, user_id, private=False):
+        response = client_for(user_id).post(
+            "/wishlists",
+            {
+                "title": "Graduation",
+                "description": "Things for my new place",
+                "spoil_surprises": False,
+                "private": private,
+            },
+            format="json",
+        )
+        return response.json()["id"]
+
+    def feed_ids(self, user_id):
+        response = client_for(user_id).get("/friends_recent_wishlists")
+        return [wishlist["id"] for wishlist in response.json()["results"]]
+
+    def test_public_wishlist_is_pushed_to_friends(self):
+        wishlist_id = self.create_wishlist(1)
+
+        self.assertEqual(self.feed_ids(2), [wishlist_id])
+        self.assertEqual(self.feed_ids(6), [wishlist_id])
+        self.assertEqual(self.feed_ids(4), [])
+
+    def test_private_wishlist_is_not_pushed(self):
+        self.create_wishlist(1, private=True)
+
+        self.assertEqual(self.feed_ids(2), [])
+
+    def test_privacy_flip_updates_feeds(self):
+        wishlist_id = self.create_wishlist(1, private=True)
+        payload = {
+            "title": "Graduation",
+            "description": "Things for my new place",
+            "spoil_surprises": False,
+            "private": False,
+        }
+
+        client_for(1).put(f"/wishlists/{wishlist_id}", payload, format="json")
+        self.assertEqual(self.feed_ids(2), [wishlist_id])
+
+        payload["private"] = True
+        client_for(1).put(f"/wishlists/{wishlist_id}", payload, format="json")
+        self.assertEqual(self.feed_ids(2), [])
+
+    def test_friendship_changes_update_feeds(self):
+        wishlist_id = self.create_wishlist(4)
+        request = Friend.objects.get(user1_id=4, user2_id=2)
+
+        client_for(2).put(
+            f"/friends/{request.id}", {"accepted": True}, format="json"
+        )
+        self.assertEqual(self.feed_ids(2), [wishlist_id])
+
+        client_for(2).delete(f"/friends/{request.id}")
+        self.assertEqual(self.feed_ids(2), [])
+
+    def test_deleted_wishlist_is_removed(self):
+        wishlist_id = self.create_wishlist(1)
+
+        client_for(1).delete(f"/wishlists/{wishlist_id}")
+
+        self.assertEqual(self.feed_ids(2), [])
+        self.assertTrue(Wishlist.deleted_objects.filter(pk=wishlist_id).exists())
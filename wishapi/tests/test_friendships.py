@@ -0,0 +1,55 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from wishapi.models import Friend
+from wishapi.services import friend_ids, invalidate_friend_ids
+
+
+class FriendIdsTests(TestCase):
+    fixtures = ["users", "tokens", "friends"]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.get(user_id=2).key}"
+        )
+
+    def test_returns_accepted_friends_from_both_sides(self):
+        self.assertEqual(friend_ids(1), {2, 3, 6})
+        self.assertEqual(friend_ids(2), {1, 3, 11})
+
+    def test_cached_after_first_lookup(self):
+        friend_ids(1)
+        with self.assertNumQueries(0):
+            self.assertEqual(friend_ids(1), {2, 3, 6})
+
+    def test_accepting_request_invalidates_both_users(self):
+        request = Friend.objects.get(user1_id=4, user2_id=2)
+        friend_ids(2)
+        friend_ids(4)
+
+        self.client.put(f"/friends/{request.id}", {"accepted": True}, format="json")
+
+        self.assertIn(4, friend_ids(2))
+        self.assertIn(2, friend_ids(4))
+
+    def test_unfriending_invalidates_both_users(self):
+        friendship = Friend.objects.get(user1_id=1, user2_id=2)
+        friend_ids(1)
+        friend_ids(2)
+
+        self.client.delete(f"/friends/{friendship.id}")
+
+        self.assertNotIn(2, friend_ids(1))
+        self.assertNotIn(1, friend_ids(2))
+
+    def test_invalidated_again_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate_friend_ids(1)
+            # A concurrent reader caches the old set before the commit
+            friend_ids(1)
+            Friend.objects.filter(user1_id=1, user2_id=2).delete()
+
+        self.assertNotIn(2, friend_ids(1))
@@ -0,0 +1,169 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from wishapi.authentication import token_cache
+from wishapi.idempotency import IDEMPOTENCY_KEY_TTL, IN_PROGRESS_TIMEOUT
+from wishapi.models import Friend, IdempotencyKey, Pin, Purchase, WishlistItem
+from wishapi.tests.helpers import client_for
+
+FIXTURES = ["users", "tokens", "priorities", "wishlists", "wishlist_items", "pins"]
+
+
+class IdempotencyTests(TestCase):
+    fixtures = FIXTURES
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        WishlistItem.objects.filter(pk=8).update(quantity=4, purchased_quantity=0)
+        self.client = client_for(1)
+
+    def purchase(self, key, quantity=1, client=None):
+        return (client or self.client).post(
+            "/purchases",
+            {"wishlist_item": 8, "quantity": quantity},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_retry_replays_first_response(self):
+        first = self.purchase("order-1")
+        retry = self.purchase("order-1")
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertNotIn("Idempotent-Replayed", first)
+        self.assertEqual(Purchase.objects.filter(user_id=1).count(), 1)
+        self.assertEqual(WishlistItem.objects.get(pk=8).purchased_quantity, 1)
+
+    def statements(self, key):
+        """The SQL statements of a purchase, without savepoints"""
+        with CaptureQueriesContext(connection) as queries:
+            self.purchase(key)
+        return [
+            query["sql"].split()[0]
+            for query in queries.captured_queries
+            if "SAVEPOINT" not in query["sql"]
+        ]
+
+    def test_new_key_is_claimed_with_one_insert(self):
+        self.purchase("warm-up")  # authentication is then served from cache
+        statements = self.statements("order-1")
+        self.assertEqual(statements[0], "INSERT")
+        self.assertEqual(statements[-1], "UPDATE")  # the stored response
+
+    def test_replay_is_one_lookup_after_the_claim(self):
+        self.purchase("order-1")
+        self.assertEqual(self.statements("order-1"), ["INSERT", "SELECT"])
+
+    def test_failed_write_caught_by_the_handler_is_stored(self):
+        def failing_create(**kwargs):
+            # Breaks the transaction, like any failed write
+            User(pk=1, username="taken").save(force_insert=True)
+
+        with mock.patch.object(Friend.objects, "create", side_effect=failing_create):
+            responses = [
+                self.client.post(
+                    "/friends", {"user_id": 2}, format="json", HTTP_IDEMPOTENCY_KEY="f"
+                )
+                for _ in range(2)
+            ]
+
+        # FriendViewSet.create answers 400 for any exception
+        self.assertEqual([response.status_code for response in responses], [400, 400])
+        self.assertEqual(responses[1]["Idempotent-Replayed"], "true")
+
+    def test_errors_are_replayed(self):
+        first = self.purchase("order-1", quantity=10)
+        WishlistItem.objects.filter(pk=8).update(quantity=20)
+        retry = self.purchase("order-1", quantity=10)
+
+        self.assertEqual(first.status_code, 400)
+        self.assertEqual(retry.status_code, 400)
+        self.assertFalse(Purchase.objects.filter(user_id=1).exists())
+
+    def test_key_reused_for_another_request(self):
+        self.purchase("order-1")
+        response = self.purchase("order-1", quantity=2)
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Purchase.objects.filter(user_id=1).count(), 1)
+
+    def test_keys_are_scoped_per_user_and_route(self):
+        self.purchase("order-1")
+        self.purchase("order-1", client=client_for(2))
+        pin = self.client.post(
+            "/pins", {"wishlist": 7}, format="json", HTTP_IDEMPOTENCY_KEY="order-1"
+        )
+
+        self.assertEqual(pin.status_code, 201)
+        self.assertEqual(Purchase.objects.filter(wishlist_item=8).count(), 2)
+
+    def test_without_key_every_request_writes(self):
+        for _ in range(2):
+            self.client.post("/pins", {"wishlist": 7}, format="json")
+
+        self.assertEqual(Pin.objects.filter(user_id=1, wishlist_id=7).count(), 2)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_request_in_progress(self):
+        self.purchase("order-1")
+        IdempotencyKey.objects.update(status=None, response=None)
+
+        response = self.purchase("order-1")
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Purchase.objects.filter(user_id=1).count(), 1)
+
+    def test_abandoned_request_runs_again(self):
+        self.purchase("order-1")
+        IdempotencyKey.objects.update(
+            status=None,
+            response=None,
+            created=timezone.now() - IN_PROGRESS_TIMEOUT - timedelta(seconds=1),
+        )
+
+        response = self.purchase("order-1")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Purchase.objects.filter(user_id=1).count(), 2)
+
+    def test_expired_key_runs_again(self):
+        self.purchase("order-1")
+        IdempotencyKey.objects.update(
+            created=timezone.now() - IDEMPOTENCY_KEY_TTL - timedelta(seconds=1)
+        )
+
+        response = self.purchase("order-1")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn("Idempotent-Replayed", response)
+        self.assertEqual(Purchase.objects.filter(user_id=1).count(), 2)
+
+    def test_key_too_long(self):
+        response = self.purchase("x" * 256)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Purchase.objects.exists())
+
+    def test_clear_idempotency_keys(self):
+        for key in ("old-1", "old-2", "new"):
+            self.purchase(key)
+        IdempotencyKey.objects.exclude(
+            pk=IdempotencyKey.objects.latest("pk").pk
+        ).update(created=timezone.now() - IDEMPOTENCY_KEY_TTL - timedelta(seconds=1))
+
+        out = StringIO()
+        call_command("clear_idempotency_keys", "--batch-size", "1", stdout=out)
+
+        self.assertIn("Deleted 2", out.getvalue())
+        self.assertEqual(IdempotencyKey.objects.count(), 1)
@@ -0,0 +1,104 @@
+import os
+from django.test import SimpleTestCase
+from wishapi.tests.helpers import MediaRootMixin
+
+IMAGE_NAME = "user_image-36d6c934-7619-4048-afb1-c43c970fe95c.png"
+HASHED_NAME = f"{'ab' * 32}.png"
+CONTENT = bytes(range(256)) * 4
+
+
+class MediaServingTests(MediaRootMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        os.makedirs(os.path.join(self.media_root, "profile"))
+        for name in (IMAGE_NAME, HASHED_NAME, "banner.png"):
+            with open(os.path.join(self.media_root, "profile", name), "wb") as file:
+                file.write(CONTENT)
+
+    def test_uuid_named_files_are_immutable(self):
+        response = self.client.get(f"/media/profile/{IMAGE_NAME}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), CONTENT)
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertEqual(response["Content-Length"], str(len(CONTENT)))
+        self.assertEqual(
+            response["Cache-Control"], "public, max-age=31536000, immutable"
+        )
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertIn("ETag", response)
+
+        response = self.client.get(f"/media/profile/{HASHED_NAME}")
+        self.assertEqual(
+            response["Cache-Control"], "public, max-age=31536000, immutable"
+        )
+
+        response = self.client.get("/media/profile/banner.png")
+        self.assertEqual(response["Cache-Control"], "public, no-cache")
+
+    def test_matching_etag_is_not_modified(self):
+        etag = self.client.get(f"/media/profile/{IMAGE_NAME}")["ETag"]
+        response = self.client.get(
+            f"/media/profile/{IMAGE_NAME}", headers={"If-None-Match": etag}
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response.content, b"")
+
+    def test_byte_ranges(self):
+        url = f"/media/profile/{IMAGE_NAME}"
+        for header, start, end in (
+            ("bytes=0-99", 0, 99),
+            ("bytes=1000-", 1000, 1023),
+            ("bytes=-24", 1000, 1023),
+            ("bytes=1000-5000", 1000, 1023),
+        ):
+            with self.subTest(header):
+                response = self.client.get(url, headers={"Range": header})
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(
+                    b"".join(response.streaming_content), CONTENT[start : end + 1]
+                )
+                self.assertEqual(response["Content-Range"], f"bytes {start}-{end}/1024")
+                self.assertEqual(response["Content-Length"], str(end - start + 1))
+
+        response = self.client.get(url, headers={"Range": "bytes=2000-"})
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */1024")
+
+        # Multiple ranges, and ranges of an older version, get the whole file
+        for headers in (
+            {"Range": "bytes=0-1,5-6"},
+            {"Range": "bytes=0-1", "If-Range": '"stale"'},
+        ):
+            response = self.client.get(url, headers=headers)
+            self.assertEqual(response.status_code, 200)
+
+    def test_missing_and_escaping_paths_are_not_found(self):
+        for url in (
+            "/media/profile/missing.png",
+            "/media/profile",
+            "/media/../wishproject/settings.py",
+            "/media/%2e%2e/wishproject/settings.py",
+        ):
+            with self.subTest(url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_unsafe_methods_are_rejected(self):
+        response = self.client.post(f"/media/profile/{IMAGE_NAME}")
+        self.assertEqual(response.status_code, 405)
+
+    def test_offload_to_front_proxy(self):
+        url = f"/media/profile/{IMAGE_NAME}"
+        with self.settings(MEDIA_SENDFILE="x-accel-redirect"):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response["X-Accel-Redirect"], f"/protected-media/profile/{IMAGE_NAME}"
+        )
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertEqual(response.content, b"")
+
+        with self.settings(MEDIA_SENDFILE="x-sendfile"):
+            response = self.client.get(url)
+        self.assertTrue(response["X-Sendfile"].endswith(f"/profile/{IMAGE_NAME}"))
+        self.assertTrue(os.path.isabs(response["X-Sendfile"]))
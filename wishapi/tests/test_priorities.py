@@ -0,0 +1,82 @@
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from wishapi.authentication import token_cache
+from wishapi.models import Priority
+from wishapi.services import (
+    get_priority,
+    priority_ids,
+    priority_name,
+    reset_priorities,
+)
+from wishapi.services import priorities
+
+
+class PriorityRegistryTests(TestCase):
+    fixtures = ["users", "tokens", "priorities", "wishlists"]
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        reset_priorities()
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.get(user_id=1).key}"
+        )
+
+    def test_lookups_are_served_from_memory(self):
+        get_priority(1)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_priority("2").name, "High Priority")
+            self.assertEqual(priority_name(1), "Must-Have")
+            self.assertEqual(priority_ids("Must-Have"), [1])
+
+    def test_generation_is_checked_once_per_interval(self):
+        with mock.patch.object(
+            priorities, "generations", wraps=priorities.generations
+        ) as checked:
+            for _ in range(50):
+                priority_name(1)
+            self.assertEqual(checked.call_count, 1)
+
+            with mock.patch.object(
+                priorities.time,
+                "monotonic",
+                return_value=priorities.time.monotonic()
+                + priorities.PRIORITY_CHECK_INTERVAL,
+            ):
+                priority_name(1)
+            self.assertEqual(checked.call_count, 2)
+
+    def test_unknown_priorities(self):
+        for pk in (999, None, "abc"):
+            with self.assertRaises(Priority.DoesNotExist):
+                get_priority(pk)
+        self.assertIsNone(priority_name(None))
+
+    def test_registry_reloads_after_a_save(self):
+        get_priority(1)
+        Priority.objects.create(name="Someday")
+        self.assertEqual(len(priority_ids("Someday")), 1)
+
+    def test_item_writes_resolve_priorities_without_a_query(self):
+        get_priority(1)
+        self.client.get("/priorities")  # warm the token cache
+        with self.assertNumQueries(3):  # wishlist, item insert, owner lookup
+            response = self.client.post(
+                "/wishlist_items",
+                {"wishlist": 1, "name": "Kite", "quantity": 1, "priority": 2},
+                format="json",
+            )
+        self.assertEqual(response.status_code, 201)
+
+    def test_priorities_are_cacheable(self):
+        response = self.client.get("/priorities")
+        self.assertIn("max-age=86400", response["Cache-Control"])
+        self.assertEqual(len(response.json()), Priority.objects.count())
+
+        response = self.client.get("/priorities", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+        self.assertIn("max-age=86400", response["Cache-Control"])
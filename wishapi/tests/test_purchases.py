@@ -0,0 +1,100 @@
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from wishapi.authentication import token_cache
+from wishapi.models import Purchase, WishlistItem
+
+
+class PurchaseQuantityTests(TestCase):
+    fixtures = [
+        "users",
+        "tokens",
+        "priorities",
+        "wishlists",
+        "wishlist_items",
+        "purchases",
+    ]
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        call_command("repair_purchase_quantities", stdout=StringIO())
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.get(user_id=1).key}"
+        )
+
+    def purchased(self, item_id):
+        return WishlistItem.all_objects.get(pk=item_id).purchased_quantity
+
+    def purchase(self, item_id, quantity):
+        return self.client.post(
+            "/purchases",
+            {"wishlist_item": item_id, "quantity": quantity},
+            format="json",
+        )
+
+    def test_create_increments_the_counter(self):
+        WishlistItem.objects.filter(pk=7).update(quantity=3)
+        before = self.purchased(7)
+
+        response = self.purchase(7, 2)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.purchased(7), before + 2)
+
+    def test_create_rejects_oversubscription(self):
+        item = WishlistItem.objects.get(pk=7)
+        remaining = item.quantity - item.purchased_quantity
+        purchases = Purchase.objects.count()
+
+        response = self.purchase(7, remaining + 1)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.purchased(7), item.purchased_quantity)
+        self.assertEqual(Purchase.objects.count(), purchases)
+
+    def test_destroy_decrements_the_counter(self):
+        purchase = Purchase.objects.filter(user_id=1).first()
+        before = self.purchased(purchase.wishlist_item_id)
+
+        response = self.client.delete(f"/purchases/{purchase.pk}")
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(
+            self.purchased(purchase.wishlist_item_id), before - purchase.quantity
+        )
+
+    def test_repair_fixes_drift(self):
+        purchase = Purchase.objects.first()
+        actual = self.purchased(purchase.wishlist_item_id)
+        WishlistItem.objects.filter(pk=purchase.wishlist_item_id).update(
+            purchased_quantity=actual + 5
+        )
+
+        out = StringIO()
+        call_command("repair_purchase_quantities", "--dry-run", stdout=out)
+        self.assertIn("1 item(s) would be repaired", out.getvalue())
+        self.assertEqual(self.purchased(purchase.wishlist_item_id), actual + 5)
+
+        out = StringIO()
+        call_command("repair_purchase_quantities", stdout=out)
+        self.assertIn("Repaired 1 item(s)", out.getvalue())
+        self.assertEqual(self.purchased(purchase.wishlist_item_id), actual)
+
+    def test_repair_refreshes_wishlist_etags(self):
+        purchase = Purchase.objects.first()
+        item = WishlistItem.objects.get(pk=purchase.wishlist_item_id)
+        url = f"/wishlists/{item.wishlist_id}"
+        tag = self.client.get(url)["ETag"]
+
+        WishlistItem.objects.filter(pk=item.pk).update(
+            purchased_quantity=item.purchased_quantity + 1
+        )
+        call_command("repair_purchase_quantities", stdout=StringIO())
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=tag)
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,618 @@
+import itertools
+import os
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from wishapi.authentication import token_cache
+from wishapi.tests.helpers import MediaRootMixin, image_file
+from wishapi.models import (
+    FeedEntry,
+    Friend,
+    Pin,
+    Priority,
+    Profile,
+    Purchase,
+    Wishlist,
+    WishlistItem,
+)
+
+FIXTURES = [
+    "users",
+    "tokens",
+    "wishlists",
+    "priorities",
+    "wishlist_items",
+    "friends",
+    "profiles",
+    "pins",
+    "purchases",
+]
+
+# Wall-clock budget for a single request against the scaled dataset
+DEFAULT_MAX_SECONDS = 1.0
+
+_unique = itertools.count()
+
+
+def scale_up(
+    viewer,
+    users=0,
+    friends=0,
+    pending=0,
+    wishlists=0,
+    items_per_list=0,
+    pins=0,
+    purchases=0,
+):
+    """
+    Bulk insert realistic data around the viewer.
+
+    Every relation an endpoint might walk grows here: strangers in the user
+    directory, accepted friends with public upcoming wishlists, pending
+    requests in both directions, the viewer's own lists and items, pins
+    and purchases.
+    """
+    priorities = list(Priority.objects.all())
+
+    def make_users(count):
+        created = User.objects.bulk_create(
+            [
+                User(
+                    username=f"user{n}@example.com",
+                    first_name=f"First{n}",
+                    last_name=f"Last{n}",
+                    password="!",
+                )
+                for n in (next(_unique) for _ in range(count))
+            ]
+        )
+        Profile.objects.bulk_create([Profile(user=user, bio="") for user in created])
+        return created
+
+    def make_lists(owners, private=False):
+        next_month = timezone.now() + timedelta(days=30)
+        return Wishlist.objects.bulk_create(
+            [
+                Wishlist(
+                    user=owner,
+                    title=f"List {next(_unique)}",
+                    description="Generated for query budget tests",
+                    private=private,
+                    date_of_event=next_month,
+                )
+                for owner in owners
+            ]
+        )
+
+    def make_items(lists):
+        return WishlistItem.objects.bulk_create(
+            [
+                WishlistItem(
+                    wishlist=wishlist,
+                    name=f"Item {next(_unique)}",
+                    website_url="https://www.example.com/item",
+                    quantity=5,
+                    priority=priorities[n % len(priorities)],
+                )
+                for wishlist in lists
+                for n in range(items_per_list)
+            ]
+        )
+
+    make_users(users)
+
+    friend_users = make_users(friends)
+    Friend.objects.bulk_create(
+        [Friend(user1=viewer, user2=friend, accepted=True) for friend in friend_users]
+    )
+
+    requesters = make_users(pending)
+    Friend.objects.bulk_create(
+        [Friend(user1=requester, user2=viewer) for requester in requesters]
+    )
+    requested = make_users(pending)
+    Friend.objects.bulk_create(
+        [Friend(user1=viewer, user2=requestee) for requestee in requested]
+    )
+
+    own_lists = make_lists([viewer] * wishlists)
+    own_lists += make_lists([viewer] * wishlists, private=True)
+    friend_lists = make_lists(friend_users)
+    FeedEntry.objects.bulk_create(
+        [
+            FeedEntry(user=viewer, wishlist=wishlist, created=wishlist.creation_date)
+            for wishlist in friend_lists
+        ]
+    )
+    make_items(own_lists)
+    friend_items = make_items(friend_lists)
+
+    Pin.objects.bulk_create(
+        [Pin(user=viewer, wishlist=wishlist) for wishlist in friend_lists[:pins]]
+    )
+    bought = friend_items[:purchases]
+    Purchase.objects.bulk_create(
+        [Purchase(user=viewer, wishlist_item=item) for item in bought]
+    )
+    WishlistItem.objects.filter(pk__in=[item.pk for item in bought]).update(
+        purchased_quantity=1
+    )
+
+    return own_lists
+
+
+def scale_up_viewer(viewer):
+    """The dataset every budget is measured against"""
+    return scale_up(
+        viewer,
+        users=1000,
+        friends=100,
+        pending=20,
+        wishlists=5,
+        items_per_list=50,
+        pins=10,
+        purchases=20,
+    )
+
+
+@contextmanager
+def capture_all_queries():
+    """
+    Collect the SQL run on every connection, including the ones worker
+    threads open while the block runs.
+    """
+    queries = []
+    wrapped = []
+
+    def record(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    def wrap(connection, **kwargs):
+        connection.execute_wrappers.append(record)
+        wrapped.append(connection)
+
+    for existing in connections.all(initialized_only=True):
+        wrap(existing)
+    connection_created.connect(wrap)
+    try:
+        yield queries
+    finally:
+        connection_created.disconnect(wrap)
+        for wrapper in wrapped:
+            if record in wrapper.execute_wrappers:
+                wrapper.execute_wrappers.remove(record)
+
+
+class QueryBudgetMixin:
+    """
+    Pin the number of queries and wall-clock time of every route.
+
+    Each endpoint is called once against the scaled dataset, the dataset is
+    grown again, and the endpoint is called a second time. The query count
+    must stay within its pinned budget and must not increase with the data.
+    Caches start cold, so budgets include the queries that fill them.
+    """
+
+    fixtures = FIXTURES
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        token_cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def grow(self):
+        # Bulk inserts bypass cache invalidation
+        cache.clear()
+        scale_up(
+            self.viewer,
+            users=100,
+            friends=10,
+            pending=5,
+            wishlists=1,
+            items_per_list=50,
+            pins=5,
+            purchases=10,
+        )
+        WishlistItem.objects.bulk_create(
+            [
+                WishlistItem(wishlist=self.big_list, name="Extra", priority_id=1)
+                for _ in range(25)
+            ]
+        )
+
+    def capture_queries(self):
+        return CaptureQueriesContext(connection)
+
+    def assertQueryBudget(
+        self,
+        method,
+        url,
+        max_queries,
+        data=None,
+        max_seconds=DEFAULT_MAX_SECONDS,
+        format="json",
+    ):
+        """
+        Call the endpoint before and after growing the dataset.
+
+        url and data may be callables so that mutating endpoints get a fresh
+        target for each call; they are resolved outside the measured block.
+        """
+        counts = []
+        for grown in (False, True):
+            if grown:
+                self.grow()
+
+            target = url() if callable(url) else url
+            payload = data() if callable(data) else data
+
+            with self.capture_queries() as queries:
+                started = time.perf_counter()
+                response = getattr(self.client, method)(target, payload, format=format)
+                elapsed = time.perf_counter() - started
+                if response.streaming:
+                    b"".join(response.streaming_content)
+
+            self.assertLess(
+                response.status_code, 400, f"{method.upper()} {target}: {response}"
+            )
+            self.assertLessEqual(
+                len(queries),
+                max_queries,
+                f"{method.upper()} {target} ran {len(queries)} queries",
+            )
+            self.assertLessEqual(
+                elapsed, max_seconds, f"{method.upper()} {target} took {elapsed:.3f}s"
+            )
+            counts.append(len(queries))
+
+        self.assertLessEqual(
+            counts[1],
+            counts[0],
+            f"{method.upper()} {url} query count grew with data size: {counts}",
+        )
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class QueryBudgetTests(QueryBudgetMixin, MediaRootMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.viewer = User.objects.get(pk=1)
+        cls.token = Token.objects.get(user=cls.viewer)
+        cls.big_list = scale_up_viewer(cls.viewer)[0]
+
+    def make_wishlist(self):
+        return Wishlist.objects.create(
+            user=self.viewer, title="Throwaway", description="Throwaway"
+        )
+
+    def make_item(self):
+        return WishlistItem.objects.create(
+            wishlist=self.big_list, name="Throwaway", priority_id=1
+        )
+
+    def make_stranger(self):
+        return User.objects.create(username=f"stranger{next(_unique)}@example.com")
+
+    # Router root and authentication routes
+
+    def test_api_root(self):
+        self.assertQueryBudget("get", "/", 1)
+
+    def test_browsable_api_login(self):
+        self.assertQueryBudget("get", reverse("rest_framework:login"), 0)
+
+    def test_register(self):
+        self.assertQueryBudget(
+            "post",
+            "/register",
+            7,
+            data=lambda: {
+                "username": f"new{next(_unique)}@example.com",
+                "password": "secret",
+                "first_name": "New",
+                "last_name": "User",
+            },
+        )
+
+    def test_login(self):
+        user = User.objects.create_user("login@example.com", password="secret")
+        Token.objects.create(user=user)
+        self.assertQueryBudget(
+            "post",
+            "/login",
+            4,
+            data={"username": "login@example.com", "password": "secret"},
+        )
+
+    def test_obtain_auth_token(self):
+        user = User.objects.create_user("token@example.com", password="secret")
+        Token.objects.create(user=user)
+        self.assertQueryBudget(
+            "post",
+            "/api-token-auth",
+            4,
+            data={"username": "token@example.com", "password": "secret"},
+        )
+
+    # Wishlists
+
+    def test_wishlist_list(self):
+        self.assertQueryBudget("get", "/wishlists", 4)
+
+    def test_wishlist_list_search(self):
+        self.assertQueryBudget("get", "/wishlists?q=List", 4)
+
+    def test_wishlist_retrieve(self):
+        self.assertQueryBudget("get", f"/wishlists/{self.big_list.id}", 4)
+
+    def test_wishlist_retrieve_filtered(self):
+        self.assertQueryBudget(
+            "get",
+            f"/wishlists/{self.big_list.id}?q=Item&priority_level=Must-Have",
+            4,
+        )
+
+    def test_wishlist_create(self):
+        self.assertQueryBudget(
+            "post",
+            "/wishlists",
+            8,
+            data={
+                "title": "New list",
+                "description": "Budget test",
+                "spoil_surprises": False,
+                "private": False,
+            },
+        )
+
+    def test_wishlist_update(self):
+        self.assertQueryBudget(
+            "put",
+            f"/wishlists/{self.big_list.id}",
+            8,
+            data={
+                "title": "Renamed",
+                "description": "Budget test",
+                "spoil_surprises": False,
+                "private": False,
+            },
+        )
+
+    def test_wishlist_destroy(self):
+        self.assertQueryBudget(
+            "delete", lambda: f"/wishlists/{self.make_wishlist().id}", 14
+        )
+
+    def test_friends_recent_wishlists(self):
+        self.assertQueryBudget("get", "/friends_recent_wishlists", 5)
+
+    def test_upcoming_events(self):
+        self.assertQueryBudget("get", "/upcoming_events", 3)
+
+    def test_upcoming_events_window(self):
+        self.assertQueryBudget(
+            "get", "/upcoming_events?from=2024-01-01&to=2100-01-01&limit=100", 3
+        )
+
+    # Wishlist items
+
+    def test_wishlist_item_create(self):
+        self.assertQueryBudget(
+            "post",
+            "/wishlist_items",
+            6,
+            data={
+                "wishlist": self.big_list.id,
+                "name": "New item",
+                "quantity": 1,
+                "priority": 1,
+            },
+        )
+
+    def test_wishlist_item_retrieve(self):
+        item = self.make_item()
+        self.assertQueryBudget("get", f"/wishlist_items/{item.id}", 3)
+
+    def test_wishlist_item_update(self):
+        item = self.make_item()
+        self.assertQueryBudget(
+            "put",
+            f"/wishlist_items/{item.id}",
+            8,
+            data={"name": "Renamed", "quantity": 2, "priority": 2},
+        )
+
+    def test_wishlist_item_destroy(self):
+        self.assertQueryBudget(
+            "delete", lambda: f"/wishlist_items/{self.make_item().id}", 8
+        )
+
+    # Priorities
+
+    def test_priority_list(self):
+        self.assertQueryBudget("get", "/priorities", 3)
+
+    # Profiles
+
+    def test_profile_list(self):
+        self.assertQueryBudget("get", "/profile", 9)
+
+    def test_profile_list_search(self):
+        self.assertQueryBudget("get", "/profile?q=First", 11)
+
+    def test_profile_retrieve(self):
+        self.assertQueryBudget("get", f"/profile/{self.viewer.id}", 6)
+
+    def test_profile_create(self):
+        self.assertQueryBudget(
+            "post", "/profile", 4, data={"bio": "Hello", "address": "Somewhere"}
+        )
+
+    def test_profile_update(self):
+        profile = Profile.objects.filter(user=self.viewer).first()
+        self.assertQueryBudget(
+            "put",
+            f"/profile/{profile.id}",
+            4,
+            data={"bio": "Updated", "address": "Elsewhere"},
+        )
+
+    # Friends
+
+    def test_friend_create(self):
+        self.assertQueryBudget(
+            "post", "/friends", 4, data=lambda: {"user_id": self.make_stranger().id}
+        )
+
+    def test_friend_update(self):
+        self.assertQueryBudget(
+            "put",
+            lambda: "/friends/%d"
+            % Friend.objects.create(user1=self.make_stranger(), user2=self.viewer).id,
+            7,
+            data={"accepted": True},
+        )
+
+    def test_friend_destroy(self):
+        self.assertQueryBudget(
+            "delete",
+            lambda: "/friends/%d"
+            % Friend.objects.create(user1=self.viewer, user2=self.make_stranger()).id,
+            6,
+        )
+
+    def test_get_all_users(self):
+        self.assertQueryBudget("get", "/friends/get_all_users", 3)
+
+    def test_get_all_users_next_page(self):
+        first_page = self.client.get("/friends/get_all_users").json()
+        cache.clear()
+        self.assertQueryBudget("get", first_page["next"], 3)
+
+    def test_get_all_users_search(self):
+        self.assertQueryBudget("get", "/friends/get_all_users?q=First1", 3)
+
+    # Purchases
+
+    def test_purchase_create(self):
+        self.assertQueryBudget(
+            "post",
+            "/purchases",
+            10,
+            data=lambda: {"wishlist_item": self.make_item().id, "quantity": 1},
+        )
+
+    def test_purchase_list(self):
+        self.assertQueryBudget("get", "/purchases", 4)
+
+    def test_purchase_destroy(self):
+        self.assertQueryBudget(
+            "delete",
+            lambda: "/purchases/%d"
+            % Purchase.objects.create(
+                user=self.viewer, wishlist_item=self.make_item()
+            ).id,
+            8,
+        )
+
+    # Pins
+
+    def test_pin_create(self):
+        self.assertQueryBudget(
+            "post", "/pins", 6, data=lambda: {"wishlist": self.make_wishlist().id}
+        )
+
+    def test_pin_list(self):
+        self.assertQueryBudget("get", "/pins", 4)
+
+    def test_pin_destroy(self):
+        self.assertQueryBudget(
+            "delete",
+            lambda: "/pins/%d"
+            % Pin.objects.create(user=self.viewer, wishlist=self.big_list).id,
+            6,
+        )
+
+    def test_purchase_checkout(self):
+        self.assertQueryBudget(
+            "post",
+            "/purchases/checkout",
+            6,
+            data=lambda: {
+                "items": [
+                    {"wishlist_item": self.make_item().id},
+                    {"wishlist_item": self.make_item().id, "quantity": 1},
+                ]
+            },
+        )
+
+    # Bulk items, uploads and media
+
+    def test_wishlist_item_bulk_create(self):
+        self.assertQueryBudget(
+            "post",
+            "/wishlist_items/bulk",
+            6,
+            data={
+                "wishlist": self.big_list.id,
+                "items": [
+                    {"name": f"Bulk {n}", "priority": "Must-Have"} for n in range(20)
+                ],
+            },
+        )
+
+    def test_profile_image_upload(self):
+        self.assertQueryBudget(
+            "post",
+            "/profile/image",
+            6,
+            data=lambda: {"image": image_file()},
+            format="multipart",
+        )
+
+    def test_media(self):
+        with open(os.path.join(self.media_root, "avatar.png"), "wb") as file:
+            file.write(image_file().read())
+        self.assertQueryBudget("get", f"{settings.MEDIA_URL}avatar.png", 0)
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class AsyncQueryBudgetTests(QueryBudgetMixin, TransactionTestCase):
+    """
+    The async views query on worker thread connections, which only see
+    committed rows, so the data is committed and every connection counted.
+    """
+
+    def setUp(self):
+        self.viewer = User.objects.get(pk=1)
+        self.token = Token.objects.get(user=self.viewer)
+        self.big_list = scale_up_viewer(self.viewer)[0]
+        super().setUp()
+
+    def capture_queries(self):
+        return capture_all_queries()
+
+    def test_async_profile(self):
+        self.assertQueryBudget("get", "/async/profile", 9)
+
+    def test_async_profile_search(self):
+        self.assertQueryBudget("get", "/async/profile?q=First", 11)
+
+    def test_async_profile_retrieve(self):
+        self.assertQueryBudget("get", f"/async/profile/{self.viewer.id}", 6)
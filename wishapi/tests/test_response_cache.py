@@ -0,0 +1,105 @@
+import threading
+import time
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework import viewsets
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from wishapi.authentication import token_cache
+from wishapi.models import Pin, WishlistItem
+from wishapi.response_cache import cached_response
+from wishapi.tests.helpers import client_for
+
+
+class SlowViewSet(viewsets.ViewSet):
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    calls = 0
+
+    @cached_response(Pin)
+    def list(self, request):
+        SlowViewSet.calls += 1
+        time.sleep(0.2)
+        return Response({"calls": SlowViewSet.calls})
+
+
+class ResponseCacheTests(TestCase):
+    fixtures = [
+        "users",
+        "tokens",
+        "priorities",
+        "wishlists",
+        "wishlist_items",
+        "friends",
+        "profiles",
+        "pins",
+        "purchases",
+    ]
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+
+    def test_repeat_reads_skip_the_database(self):
+        client = client_for(1)
+        for url in (
+            "/wishlists",
+            "/wishlists/1",
+            "/wishlists/1?q=port",
+            "/profile",
+            "/profile/2",
+            "/pins",
+            "/purchases",
+            "/upcoming_events",
+        ):
+            first = client.get(url)
+            with self.assertNumQueries(0):
+                second = client.get(url)
+            self.assertEqual(second.json(), first.json(), url)
+
+    def test_responses_are_kept_per_viewer_and_params(self):
+        self.assertNotEqual(
+            client_for(1).get("/wishlists").json(),
+            client_for(2).get("/wishlists").json(),
+        )
+        client = client_for(1)
+        client.get("/wishlists/1")
+        items = client.get("/wishlists/1?q=port").json()["wishlist_items"]
+        self.assertEqual([item["id"] for item in items], [1])
+
+    def test_writes_replace_cached_responses(self):
+        client = client_for(1)
+        client.get("/wishlists/1")
+        WishlistItem.objects.create(wishlist_id=1, name="Kite", priority_id=1)
+        names = [
+            item["name"] for item in client.get("/wishlists/1").json()["wishlist_items"]
+        ]
+        self.assertIn("Kite", names)
+
+        client.get("/pins")
+        client.delete(f"/pins/{Pin.objects.filter(user_id=1).first().id}")
+        self.assertEqual(client.get("/pins").json(), [])
+
+        client.get("/purchases")
+        client.post("/purchases", {"wishlist_item": 3}, format="json")
+        purchased = [p["wishlist_item"]["id"] for p in client.get("/purchases").json()]
+        self.assertIn(3, purchased)
+
+    def test_concurrent_misses_build_the_response_once(self):
+        SlowViewSet.calls = 0
+        view = SlowViewSet.as_view({"get": "list"})
+        factory = APIRequestFactory()
+        results = []
+
+        def fetch():
+            results.append(view(factory.get("/slow")).data)
+
+        threads = [threading.Thread(target=fetch) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(SlowViewSet.calls, 1)
+        self.assertEqual(results, [{"calls": 1}] * 4)
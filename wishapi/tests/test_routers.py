@@ -0,0 +1,165 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from asgiref.sync import iscoroutinefunction
+from django.core.cache import cache
+from django.db import connections, router
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from wishapi.authentication import token_cache
+from wishapi.management.commands.sync_replicas import copy_database
+from wishapi.models import Wishlist
+from wishapi.routers import ReplicaRoutingMiddleware, after_replication
+
+
+def read_alias(request):
+    """Stand-in view reporting where a read would go"""
+    return Wishlist.objects.all().db
+
+
+def write_then_read_alias(request):
+    router.db_for_write(Wishlist)
+    return Wishlist.objects.all().db
+
+
+async def async_read_alias(request):
+    return Wishlist.objects.all().db
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class DelayedInvalidationTests(SimpleTestCase):
+    # after_replication asks the connection whether it is in a transaction,
+    # which opens it when an earlier test closed it
+    databases = {"default"}
+
+    @override_settings(REPLICA_LAG=0.01)
+    def test_delayed_invalidations_share_one_thread(self):
+        done = threading.Semaphore(0)
+        before = threading.active_count()
+
+        # Outside a transaction, callbacks are scheduled at once
+        for _ in range(50):
+            after_replication(done.release)
+
+        self.assertLessEqual(threading.active_count(), before + 1)
+        for _ in range(50):
+            self.assertTrue(done.acquire(timeout=5))
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def route(self, view, method="get", **headers):
+        middleware = ReplicaRoutingMiddleware(view)
+        return middleware(getattr(self.factory, method)("/wishlists", headers=headers))
+
+    def test_reads_outside_requests_use_the_primary(self):
+        self.assertEqual(Wishlist.objects.all().db, "default")
+
+    def test_safe_requests_read_from_replicas(self):
+        self.assertEqual(self.route(read_alias), "replica")
+        self.assertEqual(self.route(read_alias, method="head"), "replica")
+        self.assertEqual(self.route(read_alias, method="post"), "default")
+
+    def test_reads_after_a_write_in_the_request_use_the_primary(self):
+        self.assertEqual(self.route(write_then_read_alias), "default")
+
+    async def test_async_requests_are_routed_without_a_thread(self):
+        middleware = ReplicaRoutingMiddleware(async_read_alias)
+        self.assertTrue(iscoroutinefunction(middleware))
+
+        headers = {"Authorization": "Token writer"}
+        request = self.factory.get("/wishlists", headers=headers)
+        self.assertEqual(await middleware(request), "replica")
+
+        await middleware(self.factory.post("/wishlists", headers=headers))
+        self.assertEqual(await middleware(request), "default")
+
+    def test_clients_that_wrote_stick_to_the_primary(self):
+        self.route(read_alias, method="post", Authorization="Token writer")
+        self.assertEqual(
+            self.route(read_alias, Authorization="Token writer"), "default"
+        )
+        self.assertEqual(
+            self.route(read_alias, Authorization="Token reader"), "replica"
+        )
+
+        cache.clear()
+        self.assertEqual(
+            self.route(read_alias, Authorization="Token writer"), "replica"
+        )
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_uses_the_primary(self):
+        self.assertEqual(self.route(read_alias), "default")
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRequestTests(TransactionTestCase):
+    # The test replica mirrors the test database, which only works with
+    # committed rows
+    databases = {"default", "replica"}
+    fixtures = ["users", "tokens", "priorities", "wishlists", "wishlist_items"]
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.get(user_id=1).key}"
+        )
+
+    def queries(self, method, url, data=None):
+        with CaptureQueriesContext(
+            connections["default"]
+        ) as primary, CaptureQueriesContext(connections["replica"]) as replica:
+            response = getattr(self.client, method)(url, data, format="json")
+        return response, len(primary), len(replica)
+
+    def test_viewset_reads_use_the_replica_until_the_client_writes(self):
+        for url in ("/wishlists", "/wishlists/1", "/profile/1"):
+            response, primary, replica = self.queries("get", url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(primary, 0)
+            self.assertGreater(replica, 0)
+
+        response, primary, replica = self.queries("post", "/pins", {"wishlist": 1})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(replica, 0)
+
+        response, primary, replica = self.queries("get", "/profile")
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+
+class SyncReplicasTests(SimpleTestCase):
+    def test_copies_the_primary_file(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        primary = os.path.join(directory, "primary.sqlite3")
+        replica = os.path.join(directory, "replica.sqlite3")
+
+        with sqlite3.connect(primary) as db:
+            db.execute("CREATE TABLE wish (name TEXT)")
+            db.execute("INSERT INTO wish VALUES ('bike')")
+        copy_database(primary, replica)
+        with sqlite3.connect(primary) as db:
+            db.execute("INSERT INTO wish VALUES ('kite')")
+        copy_database(primary, replica)
+
+        with sqlite3.connect(replica) as db:
+            rows = db.execute("SELECT name FROM wish ORDER BY name").fetchall()
+        self.assertEqual(rows, [("bike",), ("kite",)])
@@ -0,0 +1,156 @@
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core import checks
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from wishapi.models import Wishlist, WishlistItem
+from wishapi.services import missing_search_triggers, search
+
+
+class SearchTests(TestCase):
+    fixtures = ["users", "tokens", "priorities", "wishlists", "wishlist_items"]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.get(user_id=1).key}"
+        )
+
+    def wishlist_ids(self, text):
+        response = self.client.get("/wishlists", {"q": text})
+        data = response.json()
+        return [wishlist["id"] for wishlist in data["public"] + data["private"]]
+
+    def item_ids(self, wishlist_id, **params):
+        response = self.client.get(f"/wishlists/{wishlist_id}", params)
+        return [item["id"] for item in response.json()["wishlist_items"]]
+
+    def test_wishlists_match_word_prefixes(self):
+        self.assertEqual(self.wishlist_ids("birth"), [1])
+        self.assertEqual(self.wishlist_ids("GADG"), [2])
+        self.assertEqual(self.wishlist_ids("few things"), [1])  # description
+
+    def test_every_word_must_match(self):
+        self.assertEqual(self.wishlist_ids("tech birthday"), [])
+
+    def test_query_without_words_matches_nothing(self):
+        self.assertEqual(self.wishlist_ids('"*'), [])
+
+    def test_best_matches_come_first(self):
+        weak = Wishlist.objects.create(
+            user_id=1, title="Odds and ends", description="Maybe a camping chair"
+        )
+        strong = Wishlist.objects.create(
+            user_id=1, title="Camping trip", description="Camping gear for camping"
+        )
+        self.assertEqual(self.wishlist_ids("camp"), [strong.id, weak.id])
+
+    def test_items_match_name_and_note(self):
+        self.assertEqual(self.item_ids(1, q="port"), [1])
+        self.assertEqual(self.item_ids(1, q="sleek"), [1])  # note
+        self.assertEqual(self.item_ids(1, q="port", priority_level="Low Priority"), [])
+
+    def test_index_follows_updates(self):
+        self.client.put(
+            "/wishlists/1",
+            {
+                "title": "Retirement",
+                "description": "Gone fishing",
+                "spoil_surprises": False,
+                "private": False,
+            },
+            format="json",
+        )
+        self.assertEqual(self.wishlist_ids("retire"), [1])
+        self.assertEqual(self.wishlist_ids("birth"), [])
+
+    def test_index_follows_soft_delete_and_restore(self):
+        wishlist = Wishlist.objects.get(pk=1)
+        wishlist.delete()
+        self.assertFalse(search(Wishlist.all_objects.all(), "40th").exists())
+        self.assertFalse(search(WishlistItem.all_objects.all(), "espresso").exists())
+
+        wishlist.undelete()
+        self.assertTrue(search(Wishlist.objects.all(), "40th").exists())
+        self.assertTrue(search(WishlistItem.objects.all(), "espresso").exists())
+
+
+class PeopleSearchTests(TestCase):
+    fixtures = ["users", "tokens", "friends"]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.get(user_id=1).key}"
+        )
+
+    def directory_ids(self, text, **params):
+        response = self.client.get("/friends/get_all_users", {"q": text, **params})
+        return [user["id"] for user in response.json()["results"]]
+
+    def friend_ids(self, text):
+        response = self.client.get("/profile", {"q": text})
+        return [friend["friend_info"]["id"] for friend in response.json()["friends"]]
+
+    def test_directory_matches_name_prefixes_while_typing(self):
+        self.assertEqual(self.directory_ids("j"), [8, 9])  # friend 3 excluded
+        self.assertEqual(self.directory_ids("ja"), [8])
+        self.assertEqual(self.directory_ids("jane sm"), [8])
+        self.assertEqual(self.directory_ids("jsmith"), [8])  # username
+
+    def test_directory_results_are_limited_by_page_size(self):
+        self.assertEqual(self.directory_ids("example", page_size=2), [7, 10])
+
+    def test_names_are_case_and_accent_folded(self):
+        User.objects.filter(pk=12).update(first_name="Zoë")
+        self.assertEqual(self.directory_ids("ZOE"), [12])
+        self.assertEqual(self.directory_ids("zoë"), [12])
+
+    def test_friend_filter_only_matches_the_friend(self):
+        self.assertEqual(self.friend_ids("ty"), [6])
+        # The viewer's own name doesn't match every friendship
+        self.assertEqual(self.friend_ids("ryan"), [])
+
+
+class SearchTriggerTests(TestCase):
+    fixtures = ["users", "tokens", "priorities", "wishlists", "wishlist_items"]
+
+    def drop_triggers(self, index):
+        with connection.cursor() as cursor:
+            for trigger in ("insert", "delete", "update"):
+                cursor.execute(f"DROP TRIGGER {index}_{trigger}")
+
+    def warning_ids(self):
+        warnings = checks.run_checks(tags=[checks.Tags.database], databases=["default"])
+        return [warning.id for warning in warnings]
+
+    def test_migrations_create_every_trigger(self):
+        self.assertEqual(missing_search_triggers(), [])
+        self.assertNotIn("wishapi.W001", self.warning_ids())
+
+    def test_missing_triggers_are_reported_and_restored(self):
+        # As after a migration rebuilds the tables
+        self.drop_triggers("wishapi_user_search")
+        self.drop_triggers("wishapi_wishlist_search")
+        self.assertIn("wishapi.W001", self.warning_ids())
+
+        User.objects.filter(pk=12).update(first_name="Quentin")
+        Wishlist.objects.get(pk=1).delete()
+        self.assertFalse(search(User.objects.all(), "quentin").exists())
+        self.assertTrue(search(Wishlist.all_objects.all(), "40th").exists())
+
+        call_command("rebuild_search_indexes", stdout=StringIO())
+
+        self.assertEqual(missing_search_triggers(), [])
+        self.assertTrue(search(User.objects.all(), "quentin").exists())
+        self.assertFalse(search(Wishlist.all_objects.all(), "40th").exists())
+
+        # The restored triggers keep following changes
+        Wishlist.all_objects.get(pk=1).undelete()
+        self.assertTrue(search(Wishlist.objects.all(), "40th").exists())
@@ -0,0 +1,111 @@
+import hashlib
+import io
+import os
+import time
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from wishapi.authentication import token_cache
+from wishapi.models import Profile
+from wishapi.services import wait_for_thumbnails
+from wishapi.tests.helpers import MediaRootMixin, image_file
+
+
+class ContentAddressedStorageTests(MediaRootMixin, TestCase):
+    def test_names_files_by_content_hash(self):
+        name = default_storage.save("profile/photo.JPEG", ContentFile(b"pixels"))
+        digest = hashlib.sha256(b"pixels").hexdigest()
+        self.assertEqual(name, f"profile/{digest[:2]}/{digest[2:4]}/{digest}.jpeg")
+        with default_storage.open(name) as file:
+            self.assertEqual(file.read(), b"pixels")
+
+    def test_identical_content_is_stored_once(self):
+        first = default_storage.save("profile/a.png", ContentFile(b"same"))
+        path = default_storage.path(first)
+        os.utime(path, (0, 0))
+
+        second = default_storage.save("profile/b.png", ContentFile(b"same"))
+        self.assertEqual(first, second)
+        self.assertEqual(os.listdir(os.path.dirname(path)), [os.path.basename(path)])
+        # Re-saving counts as new for collect_media's grace period
+        self.assertGreater(os.stat(path).st_mtime, 0)
+
+        third = default_storage.save("profile/c.png", ContentFile(b"other"))
+        self.assertNotEqual(first, third)
+
+
+class CollectMediaTests(MediaRootMixin, TransactionTestCase):
+    fixtures = ["users", "tokens", "profiles"]
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        token_cache.clear()
+
+    def upload(self, user_id, upload):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.get(user_id=user_id).key}"
+        )
+        response = client.post("/profile/image", {"image": upload}, format="multipart")
+        wait_for_thumbnails(timeout=10)
+        return response
+
+    def collect(self, *args):
+        out = io.StringIO()
+        call_command("collect_media", "--min-age=0", *args, stdout=out)
+        return out.getvalue()
+
+    def files(self):
+        return {
+            os.path.relpath(os.path.join(directory, name), self.media_root)
+            for directory, _, names in os.walk(self.media_root)
+            for name in names
+        }
+
+    def test_identical_uploads_share_files(self):
+        self.upload(1, image_file())
+        self.upload(3, image_file())
+
+        first, second = Profile.objects.filter(user_id__in=[1, 3]).order_by("user_id")
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(first.thumbnails, second.thumbnails)
+        self.assertEqual(len(self.files()), 4)
+
+    def test_collects_only_unreferenced_files(self):
+        self.upload(1, image_file())
+        self.upload(3, image_file())
+        replaced = Profile.objects.get(user_id=1)
+        self.upload(1, image_file("photo.jpg", image_format="JPEG"))
+        kept = self.files()
+
+        # User 3 still shows the first image, so nothing can be collected
+        self.assertIn("Deleted 0 file(s)", self.collect())
+        self.assertEqual(self.files(), kept)
+
+        self.upload(3, image_file("photo.jpg", image_format="JPEG"))
+        output = self.collect("--dry-run", "--batch-size=2")
+        self.assertIn("4 file(s) would be deleted", output)
+        self.assertEqual(self.files(), kept)
+
+        self.assertIn("Deleted 4 file(s)", self.collect("--batch-size=2"))
+        self.assertEqual(
+            self.files(),
+            kept - {replaced.image.name, *replaced.thumbnails.values()},
+        )
+        profile = Profile.objects.get(user_id=3)
+        for name in (profile.image.name, *profile.thumbnails.values()):
+            self.assertTrue(default_storage.exists(name))
+
+    def test_recent_files_are_kept(self):
+        default_storage.save("profile/orphan.png", ContentFile(b"orphan"))
+        out = io.StringIO()
+        call_command("collect_media", stdout=out)
+        self.assertIn("Deleted 0 file(s)", out.getvalue())
+
+        time.sleep(0.01)
+        self.assertIn("Deleted 1 file(s)", self.collect())
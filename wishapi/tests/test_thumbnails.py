@@ -0,0 +1,108 @@
+import io
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TransactionTestCase
+from PIL import Image
+from wishapi.authentication import token_cache
+from wishapi.models import Profile
+from wishapi.services import wait_for_thumbnails
+from wishapi.services.thumbnails import THUMBNAIL_SIZES
+from wishapi.tests.helpers import MediaRootMixin, client_for, image_file
+
+
+class ProfileImageUploadTests(MediaRootMixin, TransactionTestCase):
+    # Thumbnails are made on another thread, which only sees committed rows
+    fixtures = ["users", "tokens", "friends", "profiles"]
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        token_cache.clear()
+
+    def upload(self, user_id, upload):
+        response = client_for(user_id).post(
+            "/profile/image", {"image": upload}, format="multipart"
+        )
+        wait_for_thumbnails(timeout=10)
+        return response
+
+    def test_upload_replaces_image_and_makes_thumbnails(self):
+        response = self.upload(1, image_file())
+        self.assertEqual(response.status_code, 200)
+
+        profile = Profile.objects.get(user_id=1)
+        self.assertRegex(profile.image.name, r"^profile/\w\w/\w\w/[0-9a-f]{64}\.png$")
+        self.assertEqual(response.json()["image"], profile.image.url)
+
+        self.assertEqual(sorted(profile.thumbnails), sorted(map(str, THUMBNAIL_SIZES)))
+        for size, name in profile.thumbnails.items():
+            with default_storage.open(name) as thumbnail, Image.open(
+                thumbnail
+            ) as image:
+                self.assertEqual(max(image.size), int(size))
+                self.assertEqual(image.format, "PNG")
+
+    def test_new_upload_replaces_thumbnails(self):
+        self.upload(1, image_file())
+        previous = Profile.objects.get(user_id=1)
+
+        self.upload(1, image_file("photo.jpg", image_format="JPEG"))
+        profile = Profile.objects.get(user_id=1)
+        self.assertTrue(profile.image.name.endswith(".jpeg"))
+        self.assertEqual(len(profile.thumbnails), len(THUMBNAIL_SIZES))
+        self.assertFalse(
+            set(profile.thumbnails.values()) & set(previous.thumbnails.values())
+        )
+
+    def test_upload_creates_missing_profile(self):
+        Profile.objects.filter(user_id=1).delete()
+        response = self.upload(1, image_file())
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["user"], 1)
+
+    def test_rejects_missing_and_invalid_images(self):
+        client = client_for(1)
+        response = client.post("/profile/image", {}, format="multipart")
+        self.assertEqual(response.status_code, 400)
+
+        response = client.post(
+            "/profile/image",
+            {"image": SimpleUploadedFile("notes.png", b"not an image")},
+            format="multipart",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json(), {"error": "The file is not a supported image"}
+        )
+
+    def test_friend_lists_show_smallest_thumbnail(self):
+        self.upload(1, image_file())
+        smallest = Profile.objects.get(user_id=1).thumbnails[str(min(THUMBNAIL_SIZES))]
+
+        # User 3 is friends with user 1
+        friends = client_for(3).get("/profile").json()["friends"]
+        images = [
+            friend["friend_info"]["profile"]["image"]
+            for friend in friends
+            if friend["friend_info"]["id"] == 1
+        ]
+        self.assertEqual(images, [f"http://testserver/media/{smallest}"])
+
+        # The people directory shows it to users who aren't friends yet
+        users = client_for(8).get("/friends/get_all_users").json()["results"]
+        images = [user["profile"]["image"] for user in users if user["id"] == 1]
+        self.assertEqual(images, [f"/media/{smallest}"])
+
+    def test_generate_thumbnails_backfills_existing_images(self):
+        name = default_storage.save(
+            "profile/legacy.jpeg", image_file(image_format="JPEG")
+        )
+        Profile.objects.filter(user_id=1).update(image=name)
+
+        call_command("generate_thumbnails", stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertEqual(
+            sorted(Profile.objects.get(user_id=1).thumbnails),
+            sorted(map(str, THUMBNAIL_SIZES)),
+        )
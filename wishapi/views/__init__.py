@@ -6,3 +6,5 @@ from .friends import FriendViewSet
 from .wishlist_items import WishlistItemViewSet, WishlistItemSerializer
 from .purchases import PurchaseViewSet
 from .pins import PinViewSet
+from .dashboard import profile_dashboard, profile_dashboard_detail
+from .media import serve_media
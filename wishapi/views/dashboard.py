@@ -0,0 +1,171 @@
+import asyncio
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser, User
+from django.db import close_old_connections
+from django.http import HttpResponse, HttpResponseNotModified, HttpResponseServerError
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.renderers import JSONRenderer
+from wishapi.authentication import CachedTokenAuthentication
+from wishapi.conditional import current_etag, is_not_modified
+from wishapi.views.profile import (
+    dashboard_data,
+    dashboard_loaders,
+    load_friend_profiles,
+    profile_data,
+    profile_loaders,
+)
+
+
+def json_response(data, status=200, headers=None):
+    """Render like the DRF views, so both variants return identical bytes"""
+    return HttpResponse(
+        JSONRenderer().render(data),
+        status=status,
+        headers=headers,
+        content_type="application/json",
+    )
+
+
+async def authenticate(request, required=True):
+    """
+    Authenticate a token request like the DRF views.
+
+    Sets request.user and request.auth and returns None, or returns a 401
+    response for an invalid token, or for a missing one when required.
+    """
+    authentication = CachedTokenAuthentication()
+    try:
+        result = await sync_to_async(authentication.authenticate)(request)
+    except AuthenticationFailed as ex:
+        result, detail = None, ex.detail
+    else:
+        detail = "Authentication credentials were not provided."
+        if result is None and not required:
+            request.user, request.auth = AnonymousUser(), None
+            return None
+
+    if result is None:
+        return json_response(
+            {"detail": detail},
+            status=401,
+            headers={"WWW-Authenticate": authentication.authenticate_header(request)},
+        )
+
+    request.user, request.auth = result
+    return None
+
+
+def run_query(load):
+    """Run a loader on a worker thread, with that thread's own connection"""
+    close_old_connections()
+    return load()
+
+
+async def load_concurrently(loaders):
+    """
+    Run independent loaders at once, each on its own thread and database
+    connection, and return their results by name. WAL lets SQLite serve
+    the readers side by side.
+    """
+    results = await asyncio.gather(
+        *(
+            sync_to_async(run_query, thread_sensitive=False)(load)
+            for load in loaders.values()
+        )
+    )
+    return dict(zip(loaders, results))
+
+
+async def not_modified(request, resources):
+    """A 304 response when the client's ETag is current, plus the ETag"""
+    tag = await sync_to_async(current_etag)(request, resources, [User])
+    if is_not_modified(request, tag):
+        return HttpResponseNotModified(headers={"ETag": tag}), tag
+    return None, tag
+
+
+async def profile_dashboard(request):
+    """
+    @api {GET} /async/profile get current User Profile (async)
+    @apiName GetUserProfileAsync
+    @apiGroup Profiles
+
+    @apiHeader {String} Authorization Auth token
+    @apiHeaderExample {String} Authorization:
+        Token d74b97fbe905134520bb236b0016703f50380dcf
+
+    @apiSuccess {Object} response Same as GET /profile, with the same ETag.
+        The profile, wishlists, friends, requests and pins are queried at
+        once on separate connections.
+    """
+    error = await authenticate(request)
+    if error:
+        return error
+
+    try:
+        user = request.user
+        response, tag = await not_modified(request, [("profile", user.pk)])
+        if response:
+            return response
+
+        loaded = await load_concurrently(
+            dashboard_loaders(user, request.GET.get("q", None))
+        )
+        friend_profiles = await sync_to_async(load_friend_profiles)(
+            user,
+            loaded["friends"],
+            loaded["received_requests"],
+            loaded["sent_requests"],
+        )
+
+        return json_response(
+            dashboard_data(request, user, loaded, friend_profiles),
+            headers={"ETag": tag},
+        )
+
+    except Exception as ex:
+        return HttpResponseServerError(str(ex))
+
+
+async def profile_dashboard_detail(request, pk):
+    """
+    @api {GET} /async/profile/:id Retrieve User Profile (async)
+    @apiName RetrieveUserProfileAsync
+    @apiGroup Profiles
+
+    @apiHeader {String} Authorization Auth token
+    @apiHeaderExample {String} Authorization:
+        Token d74b97fbe905134520bb236b0016703f50380dcf
+
+    @apiParam {Number} pk User's unique ID.
+
+    @apiSuccess {Object} response Same as GET /profile/:id, with the same
+        ETag. The profile, wishlists and friends are queried at once on
+        separate connections.
+    """
+    # Like ProfileViewSet, other users' profiles are readable anonymously
+    error = await authenticate(request, required=False)
+    if error:
+        return error
+
+    try:
+        response, tag = await not_modified(request, [("profile", pk)])
+        if response:
+            return response
+
+        user = await User.objects.aget(pk=pk)
+        loaded = await load_concurrently(profile_loaders(user))
+        friend_profiles = await sync_to_async(load_friend_profiles)(
+            user, loaded["friends"]
+        )
+
+        return json_response(
+            profile_data(request, user, loaded, friend_profiles),
+            headers={"ETag": tag},
+        )
+
+    except User.DoesNotExist as ex:
+        return json_response({"message": ex.args[0]}, status=404)
+
+    except Exception as ex:
+        return HttpResponseServerError(str(ex))
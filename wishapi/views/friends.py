@@ -3,16 +3,20 @@ from rest_framework.response import Response
 from rest_framework import status
 from wishapi.models import Friend, Profile
 from django.contrib.auth.models import User
-from wishapi.views import UserSerializer
-from django.db.models import Q, Value, Case, When, IntegerField
+from wishapi.views.profile import ProfileImageSerializer
+from django.db.models import Exists, OuterRef, Subquery
 from rest_framework.decorators import action
-
-
-class ProfileImageSerializer(serializers.ModelSerializer):
-
-    class Meta:
-        model = Profile
-        fields = ("image",)
+from wishapi.pagination import UserDirectoryPagination
+from wishapi.idempotency import idempotent
+from django.db import transaction
+from wishapi.services import (
+    friend_ids,
+    invalidate_friend_ids,
+    connect_feeds,
+    disconnect_feeds,
+    invalidate_next_events,
+    search,
+)
 
 
 class FriendSerializer(serializers.ModelSerializer):
@@ -21,6 +25,32 @@ class FriendSerializer(serializers.ModelSerializer):
         fields = ["id", "user1", "user2", "accepted"]
 
 
+class UserDirectorySerializer(serializers.ModelSerializer):
+    """JSON serializer for users annotated by FriendViewSet.get_all_users"""
+
+    friend_request_sent = serializers.BooleanField(read_only=True)
+    friend_request_received = serializers.BooleanField(read_only=True)
+    profile = serializers.SerializerMethodField()
+
+    class Meta:
+        model = User
+        fields = [
+            "id",
+            "username",
+            "first_name",
+            "last_name",
+            "friend_request_sent",
+            "friend_request_received",
+            "profile",
+        ]
+
+    def get_profile(self, obj):
+        # The image paths are joined in by the queryset, so no Profile lookup
+        return ProfileImageSerializer(
+            Profile(image=obj.profile_image, thumbnails=obj.profile_thumbnails or {})
+        ).data
+
+
 class FriendViewSet(viewsets.ViewSet):
     """View for interacting with user friends"""
 
@@ -55,7 +85,16 @@ class FriendViewSet(viewsets.ViewSet):
             )
 
         friend.accepted = accepted_value
-        friend.save()
+        with transaction.atomic():
+            friend.save()
+            invalidate_friend_ids(friend.user1_id, friend.user2_id)
+            invalidate_next_events(friend.user1_id, friend.user2_id)
+
+            # Share or withdraw each other's recent wishlists
+            if friend.accepted:
+                connect_feeds(friend.user1_id, friend.user2_id)
+            else:
+                disconnect_feeds(friend.user1_id, friend.user2_id)
 
         return Response({}, status=status.HTTP_204_NO_CONTENT)
 
@@ -77,10 +116,15 @@ class FriendViewSet(viewsets.ViewSet):
                 "Friend instance not found", status=status.HTTP_404_NOT_FOUND
             )
 
-        friend.delete()
+        with transaction.atomic():
+            friend.delete()
+            invalidate_friend_ids(friend.user1_id, friend.user2_id)
+            invalidate_next_events(friend.user1_id, friend.user2_id)
+            disconnect_feeds(friend.user1_id, friend.user2_id)
 
         return Response({}, status=status.HTTP_204_NO_CONTENT)
 
+    @idempotent
     def create(self, request):
         """
         @api {POST} /friends Create a new friend instance
@@ -88,6 +132,8 @@ class FriendViewSet(viewsets.ViewSet):
         @apiGroup Friends
 
         @apiHeader {String} Authorization Auth token
+        @apiHeader {String} [Idempotency-Key] Retries with the same key replay
+            the first response instead of writing again, for 24 hours
         @apiHeaderExample {String} Authorization
             Token 9ba45f09651c5b0c404f37a2d2572c026c146611
 
@@ -121,6 +167,7 @@ class FriendViewSet(viewsets.ViewSet):
             new_friend = Friend.objects.create(
                 user1=user, user2=friend_user, accepted=False
             )
+            invalidate_friend_ids(user.id, friend_user.id)
 
             serializer = FriendSerializer(new_friend, context={"request": request})
             return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -136,57 +183,80 @@ class FriendViewSet(viewsets.ViewSet):
     def get_all_users(self, request):
         """
         Get all users in the database, excluding the current user and the user's friends.
-        """
-        current_user = request.user
 
-        # Retrieve the IDs of the user's friends
-        friend_ids = Friend.objects.filter(
-            Q(user1=current_user, accepted=True) | Q(user2=current_user, accepted=True)
-        ).values_list("user1_id", "user2_id")
+        @api {GET} /friends/get_all_users GET a page of users who are not friends
+        @apiName GetAllUsers
+        @apiGroup Friends
 
-        # Extract all friend IDs into a single list
-        all_friend_ids = [
-            friend_id for friend_pair in friend_ids for friend_id in friend_pair
-        ]
+        @apiHeader {String} Authorization Auth token
+        @apiHeaderExample {String} Authorization
+            Token 9ba45f09651c5b0c404f37a2d2572c026c146611
 
-        # Get IDs of users to whom the current user has sent friend requests
-        friend_requests_sent = Friend.objects.filter(
-            user1=current_user, accepted=False
-        ).values_list("user2_id", flat=True)
+        @apiParam {String} [q] Filter users whose first name, last name or username start
+            with every word, e.g. "ja smi" while typing "Jane Smith"
+        @apiParam {String} [cursor] Opaque cursor taken from a previous page's next/previous link
+        @apiParam {Number} [page_size] Users per page (default 50, max 200); lower it to
+            limit typeahead results
 
-        # Get IDs of users to whom the current user has sent friend requests
-        friend_requests_received = Friend.objects.filter(
-            user2=current_user, accepted=False
-        ).values_list("user1_id", flat=True)
+        @apiSuccessExample {json} Success
+            HTTP/1.1 200 OK
+            {
+                "next": "http://localhost:8000/friends/get_all_users?cursor=cD01MA%3D%3D",
+                "previous": null,
+                "results": [
+                    {
+                        "id": 4,
+                        "username": "bryan@nilson.com",
+                        "first_name": "Bryan",
+                        "last_name": "Nilson",
+                        "friend_request_sent": false,
+                        "friend_request_received": false,
+                        "profile": {
+                            "image": "/media/profile/user_image-3924ed36-25d7-42de-8b59-f6ddd7ec53cb.jpeg"
+                        }
+                    }
+                ]
+            }
+        """
+        current_user = request.user
 
         # Exclude the current user and the user's friends from the query
-        users = User.objects.exclude(Q(id=current_user.id) | Q(id__in=all_friend_ids))
+        users = (
+            User.objects.exclude(id=current_user.id)
+            .exclude(id__in=friend_ids(current_user.id))
+            .annotate(
+                # Whether the current user has sent or received a pending request
+                friend_request_sent=Exists(
+                    Friend.objects.filter(
+                        user1=current_user, user2=OuterRef("pk"), accepted=False
+                    )
+                ),
+                friend_request_received=Exists(
+                    Friend.objects.filter(
+                        user1=OuterRef("pk"), user2=current_user, accepted=False
+                    )
+                ),
+                # Join in the profile image paths
+                profile_image=Subquery(
+                    Profile.objects.filter(user=OuterRef("pk"))
+                    .order_by("pk")
+                    .values("image")[:1]
+                ),
+                profile_thumbnails=Subquery(
+                    Profile.objects.filter(user=OuterRef("pk"))
+                    .order_by("pk")
+                    .values("thumbnails")[:1]
+                ),
+            )
+        )
 
-        # Filter friends by name if search query is provided
+        # Filter users by name prefix if search query is provided
         search_query = request.query_params.get("q", None)
         if search_query:
-            users = users.filter(
-                Q(first_name__icontains=search_query)
-                | Q(last_name__icontains=search_query)
-                | Q(username__icontains=search_query)
-            )
+            users = search(users, search_query)
+
+        paginator = UserDirectoryPagination()
+        page = paginator.paginate_queryset(users, request, view=self)
+        serializer = UserDirectorySerializer(page, many=True)
 
-        serialized_users = []
-        for user in users:
-            serialized_user = UserSerializer(user).data
-            # Check if the user has already received a friend request from the current user
-            friend_request_sent = user.id in friend_requests_sent
-            serialized_user["friend_request_sent"] = friend_request_sent
-            friend_request_received = user.id in friend_requests_received
-            serialized_user["friend_request_received"] = friend_request_received
-            # Append the profile image to the serialized user
-            try:
-                profile = Profile.objects.get(user=user)
-
-            except Profile.DoesNotExist:
-                profile = None
-
-            serialized_user["profile"] = ProfileImageSerializer(profile).data
-            serialized_users.append(serialized_user)
-
-        return Response(serialized_users)
+        return paginator.get_paginated_response(serializer.data)
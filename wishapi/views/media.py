@@ -0,0 +1,150 @@
+import mimetypes
+import os
+import re
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    StreamingHttpResponse,
+)
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+
+# Uploads are named by their content hash, or by a fresh uuid before
+# wishapi.storage, so the content behind these names never changes
+IMMUTABLE_NAME = re.compile(
+    r"^([0-9a-f]{64}|user_image-[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}"
+    r"-[0-9a-f]{12}(-\d+)?)\.\w+$"
+)
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Anything else may be replaced in place, so clients revalidate with the ETag
+MUTABLE_CACHE_CONTROL = "public, no-cache"
+
+RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+CHUNK_SIZE = 64 * 1024
+
+
+def _byte_range(request, etag, size):
+    """
+    The (start, end) byte range requested, inclusive, None to send the whole
+    file, or False when the range can't be satisfied.
+
+    Only single ranges are served; anything else is answered with the whole
+    file, which clients must accept.
+    """
+    header = request.headers.get("Range")
+    if not header or request.headers.get("If-Range", etag) != etag:
+        return None
+
+    match = RANGE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+
+    first, last = match.groups()
+    if not first:
+        # A suffix range asks for the last bytes of the file
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _read_range(path, start, length):
+    with open(path, "rb") as file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def _offload(path, name):
+    """Response asking the front proxy to send the file, or None"""
+    mode = getattr(settings, "MEDIA_SENDFILE", None)
+    if mode == "x-sendfile":
+        return HttpResponse(headers={"X-Sendfile": path})
+    if mode == "x-accel-redirect":
+        location = settings.MEDIA_ACCEL_REDIRECT_LOCATION.rstrip("/")
+        return HttpResponse(headers={"X-Accel-Redirect": f"{location}/{name}"})
+    return None
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Serve an uploaded file from MEDIA_ROOT with caching headers.
+
+    Answers conditional requests with 304, single byte ranges with 206, and
+    with MEDIA_SENDFILE set hands the bytes to the front proxy through
+    X-Sendfile (Apache, lighttpd) or X-Accel-Redirect (nginx).
+    """
+    try:
+        full_path = safe_join(os.path.abspath(settings.MEDIA_ROOT), path)
+    except SuspiciousFileOperation:
+        raise Http404("File not found")
+
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404("File not found")
+    if not os.path.isfile(full_path):
+        raise Http404("File not found")
+
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    cache_control = (
+        IMMUTABLE_CACHE_CONTROL
+        if IMMUTABLE_NAME.match(os.path.basename(full_path))
+        else MUTABLE_CACHE_CONTROL
+    )
+
+    def finish(response):
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(stat.st_mtime)
+        response["Cache-Control"] = cache_control
+        return response
+
+    not_modified = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime)
+    )
+    if not_modified is not None:
+        return finish(not_modified)
+
+    content_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+
+    offloaded = _offload(full_path, path)
+    if offloaded is not None:
+        # The proxy sends the body, and answers ranges itself
+        offloaded["Content-Type"] = content_type
+        return finish(offloaded)
+
+    byte_range = _byte_range(request, etag, stat.st_size)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{stat.st_size}"
+        return finish(response)
+
+    if byte_range is None:
+        response = FileResponse(open(full_path, "rb"), content_type=content_type)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            _read_range(full_path, start, end - start + 1),
+            status=206,
+            content_type=content_type,
+        )
+        response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+        response["Content-Length"] = end - start + 1
+
+    response["Accept-Ranges"] = "bytes"
+    response["X-Content-Type-Options"] = "nosniff"
+    return finish(response)
@@ -5,6 +5,8 @@ from rest_framework.response import Response
 from rest_framework import status, serializers
 from wishapi.models import Pin, Wishlist
 from wishapi.views import UserSerializer
+from wishapi.response_cache import cached_response
+from wishapi.idempotency import idempotent
 
 
 class WishlistSerializer(serializers.ModelSerializer):
@@ -35,6 +37,7 @@ class PinSerializer(serializers.ModelSerializer):
 class PinViewSet(viewsets.ViewSet):
     """View for interacting with wishlist pins to homepage"""
 
+    @idempotent
     def create(self, request):
         """
         Create a new pin.
@@ -44,6 +47,8 @@ class PinViewSet(viewsets.ViewSet):
         @apiGroup Pins
 
         @apiHeader {String} Authorization Auth token
+        @apiHeader {String} [Idempotency-Key] Retries with the same key replay
+            the first response instead of writing again, for 24 hours
         @apiHeaderExample {String} Authorization:
             Token d74b97fbe905134520bb236b0016703f50380dcf
 
@@ -81,6 +86,7 @@ class PinViewSet(viewsets.ViewSet):
         except Exception as ex:
             return Response({"reason": str(ex)}, status=status.HTTP_400_BAD_REQUEST)
 
+    @cached_response(Pin, Wishlist, User)
     def list(self, request):
         """
         List all pins.
@@ -121,7 +127,9 @@ class PinViewSet(viewsets.ViewSet):
             ]
         """
         try:
-            pins = Pin.objects.filter(user=request.user)
+            pins = Pin.objects.filter(user=request.user).select_related(
+                "wishlist__user"
+            )
             serializer = PinSerializer(pins, many=True)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Exception as e:
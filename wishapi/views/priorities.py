@@ -2,6 +2,12 @@ from rest_framework import viewsets
 from rest_framework.response import Response
 from rest_framework import serializers
 from wishapi.models import Priority
+from wishapi.conditional import etag
+from wishapi.services import all_priorities
+
+# Priorities rarely change, so clients may reuse them for a day and then
+# revalidate them with their ETag
+PRIORITIES_MAX_AGE = 60 * 60 * 24
 
 
 class PrioritySerializer(serializers.ModelSerializer):
@@ -13,6 +19,11 @@ class PrioritySerializer(serializers.ModelSerializer):
 class PriorityViewSet(viewsets.ViewSet):
     """View for interacting with item priority"""
 
+    @etag(
+        lambda request: [],
+        Priority,
+        cache_control={"private": True, "max_age": PRIORITIES_MAX_AGE},
+    )
     def list(self, request):
         """
         @api {GET} /priorities GET all the priority options
@@ -24,7 +35,7 @@ class PriorityViewSet(viewsets.ViewSet):
             Token 9ba45f09651c5b0c404f37a2d2572c026c146611
         """
 
-        priorities = Priority.objects.all()
+        priorities = all_priorities()
 
         serializer = PrioritySerializer(
             priorities, many=True, context={"request": request}
@@ -1,8 +1,14 @@
 from rest_framework import serializers, viewsets, status
 from rest_framework.response import Response
+from django.db import transaction
+from django.db.models import F
 from wishapi.models import Purchase, WishlistItem, Wishlist
 from django.contrib.auth.models import User
 from wishapi.views import UserSerializer
+from wishapi.response_cache import bump_generation, cached_response
+from wishapi.conditional import bump_versions
+from wishapi.idempotency import idempotent
+from rest_framework.decorators import action
 
 
 class WishlistSerializer(serializers.ModelSerializer):
@@ -38,6 +44,7 @@ class PurchaseSerializer(serializers.ModelSerializer):
 class PurchaseViewSet(viewsets.ViewSet):
     """View for interacting with item purchases"""
 
+    @idempotent
     def create(self, request):
         """
         Create a new purchase.
@@ -47,6 +54,8 @@ class PurchaseViewSet(viewsets.ViewSet):
         @apiGroup Purchases
 
         @apiHeader {String} Authorization Auth token
+        @apiHeader {String} [Idempotency-Key] Retries with the same key replay
+            the first response instead of writing again, for 24 hours
         @apiHeaderExample {String} Authorization:
             Token d74b97fbe905134520bb236b0016703f50380dcf
 
@@ -72,20 +81,48 @@ class PurchaseViewSet(viewsets.ViewSet):
 
         wishlist_item_id = request.data.get("wishlist_item")
         try:
-            item = WishlistItem.objects.select_for_update().get(pk=wishlist_item_id)
-
-        except:
+            quantity = int(request.data.get("quantity", 1))
+        except (TypeError, ValueError):
             return Response(
-                {"error": "Wishlist item not found"}, status=status.HTTP_404_NOT_FOUND
+                {"reason": "Quantity must be a whole number"},
+                status=status.HTTP_400_BAD_REQUEST,
             )
 
-        purchase = Purchase()
-        purchase.wishlist_item = item
-        purchase.user = request.auth.user
-        purchase.quantity = request.data.get("quantity")
+        if quantity < 1:
+            return Response(
+                {"reason": "Quantity must be at least 1"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
         try:
-            purchase.save()
+            with transaction.atomic():
+                try:
+                    item = WishlistItem.objects.select_for_update().get(
+                        pk=wishlist_item_id
+                    )
+                except (WishlistItem.DoesNotExist, ValueError):
+                    return Response(
+                        {"error": "Wishlist item not found"},
+                        status=status.HTTP_404_NOT_FOUND,
+                    )
+
+                # Only bump the counter if it stays within the requested quantity
+                reserved = WishlistItem.objects.filter(
+                    pk=item.pk,
+                    purchased_quantity__lte=F("quantity") - quantity,
+                ).update(purchased_quantity=F("purchased_quantity") + quantity)
+
+                if not reserved:
+                    return Response(
+                        {"reason": "Requested quantity exceeds the quantity remaining"},
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
+
+                purchase = Purchase()
+                purchase.wishlist_item = item
+                purchase.user = request.auth.user
+                purchase.quantity = quantity
+                purchase.save()
 
             serializer = PurchaseSerializer(purchase, context={"request": request})
             return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -93,6 +130,7 @@ class PurchaseViewSet(viewsets.ViewSet):
         except Exception as ex:
             return Response({"reason": ex.args[0]}, status=status.HTTP_400_BAD_REQUEST)
 
+    @cached_response(Purchase, WishlistItem, Wishlist, User)
     def list(self, request):
         """
         Retrieve all purchases for the authenticated user.
@@ -137,7 +175,9 @@ class PurchaseViewSet(viewsets.ViewSet):
             }
         ]
         """
-        purchases = Purchase.objects.filter(user=request.auth.user)
+        purchases = Purchase.objects.filter(user=request.auth.user).select_related(
+            "wishlist_item__wishlist__user"
+        )
         serializer = PurchaseSerializer(
             purchases, many=True, context={"request": request}
         )
@@ -167,7 +207,12 @@ class PurchaseViewSet(viewsets.ViewSet):
                     {"error": "You don't have permission to delete this purchase"},
                     status=status.HTTP_403_FORBIDDEN,
                 )
-            purchase.delete()
+            with transaction.atomic():
+                purchase.delete()
+                # Soft deleted items keep their counter in step as well
+                WishlistItem.all_objects.filter(pk=purchase.wishlist_item_id).update(
+                    purchased_quantity=F("purchased_quantity") - purchase.quantity
+                )
             return Response(status=status.HTTP_204_NO_CONTENT)
         except Purchase.DoesNotExist:
             return Response(
@@ -175,3 +220,120 @@ class PurchaseViewSet(viewsets.ViewSet):
             )
         except Exception as ex:
             return Response({"reason": ex.args[0]}, status=status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=False, methods=["post"])
+    @idempotent
+    def checkout(self, request):
+        """
+        Purchase several wishlist items at once, all or nothing.
+
+        @api {POST} /purchases/checkout Check out Purchases
+        @apiName CheckoutPurchases
+        @apiGroup Purchases
+
+        @apiHeader {String} Authorization Auth token
+        @apiHeader {String} [Idempotency-Key] Retries with the same key replay
+            the first response instead of writing again, for 24 hours
+        @apiHeaderExample {String} Authorization:
+            Token d74b97fbe905134520bb236b0016703f50380dcf
+
+        @apiBody {Object[]} items Items to purchase
+        @apiBody {Number} items.wishlist_item Wishlist item ID.
+        @apiBody {Number} [items.quantity=1] Quantity of the item.
+        @apiParamExample {json} Input
+            {
+                "items": [
+                    {"wishlist_item": 8, "quantity": 2},
+                    {"wishlist_item": 9}
+                ]
+            }
+
+        @apiSuccess (201) {Object[]} purchases Created purchases, like GET /purchases
+
+        @apiError (400) {Object[]} errors Items that can't be purchased, with the
+            quantity remaining. Nothing is purchased unless every item can be.
+            {
+                "errors": [
+                    {"wishlist_item": 9, "remaining": 0, "reason": "Requested quantity exceeds the quantity remaining"}
+                ]
+            }
+        @apiError (404) {Number[]} missing Wishlist item IDs that don't exist
+        """
+        requested = {}
+        # The body must be an object holding the items, not a bare list
+        lines = request.data.get("items") if isinstance(request.data, dict) else None
+        if not isinstance(lines, list) or not lines:
+            return Response(
+                {"reason": "Provide a list of items to purchase"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            for line in lines:
+                item_id = int(line["wishlist_item"])
+                quantity = int(line.get("quantity", 1))
+                if quantity < 1:
+                    raise ValueError
+                # Buying an item twice in one checkout adds up the quantities
+                requested[item_id] = requested.get(item_id, 0) + quantity
+        except (KeyError, TypeError, ValueError, AttributeError):
+            return Response(
+                {
+                    "reason": "Each item needs a wishlist_item and a whole "
+                    "quantity of at least 1"
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        with transaction.atomic():
+            # Lock the rows in id order, so concurrent checkouts of overlapping
+            # items queue up instead of deadlocking
+            items = list(
+                WishlistItem.objects.select_for_update(of=("self",))
+                .select_related("wishlist__user")
+                .filter(pk__in=requested)
+                .order_by("pk")
+            )
+
+            missing = sorted(set(requested) - {item.pk for item in items})
+            if missing:
+                return Response({"missing": missing}, status=status.HTTP_404_NOT_FOUND)
+
+            errors = [
+                {
+                    "wishlist_item": item.pk,
+                    "remaining": item.leftover_quantity,
+                    "reason": "Requested quantity exceeds the quantity remaining",
+                }
+                for item in items
+                if requested[item.pk] > item.leftover_quantity
+            ]
+            if errors:
+                return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+            for item in items:
+                item.purchased_quantity += requested[item.pk]
+            WishlistItem.objects.bulk_update(items, ["purchased_quantity"])
+
+            purchases = Purchase.objects.bulk_create(
+                [
+                    Purchase(
+                        wishlist_item=item,
+                        user=request.auth.user,
+                        quantity=requested[item.pk],
+                    )
+                    for item in items
+                ]
+            )
+
+            # bulk_create and bulk_update send no signals, so refresh cached
+            # responses here
+            bump_generation(Purchase)
+            bump_generation(WishlistItem)
+            for wishlist in {item.wishlist for item in items}:
+                bump_versions("wishlist", wishlist.pk)
+                bump_versions("wishlists", wishlist.user_id)
+
+        serializer = PurchaseSerializer(
+            purchases, many=True, context={"request": request}
+        )
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
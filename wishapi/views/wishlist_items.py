@@ -1,8 +1,24 @@
+import csv
+import io
+import json
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.parsers import JSONParser, MultiPartParser
 from rest_framework.response import Response
 from rest_framework import serializers, status
 from django.contrib.auth.models import User
+from django.db import transaction
 from wishapi.models import WishlistItem, Wishlist, Priority
+from wishapi.services import get_priority, find_priority
+from wishapi.conditional import bump_versions
+from wishapi.idempotency import idempotent
+from wishapi.response_cache import bump_generation
+
+# Most items accepted by one bulk request or import file
+BULK_ITEMS_MAX = 500
+# Import files are read whole, so larger files are refused before reading
+BULK_IMPORT_MAX_SIZE = 1024 * 1024
+BULK_ITEM_FIELDS = ("name", "quantity", "website_url", "note", "priority")
 
 
 class WishlistItemSerializer(serializers.ModelSerializer):
@@ -22,6 +38,56 @@ class WishlistItemSerializer(serializers.ModelSerializer):
         ]
 
 
+class WishlistItemImportSerializer(serializers.Serializer):
+    """Validates one row of a bulk create or import"""
+
+    name = serializers.CharField(max_length=255)
+    quantity = serializers.IntegerField(min_value=1, default=1)
+    website_url = serializers.URLField(required=False, allow_null=True)
+    note = serializers.CharField(max_length=255, required=False, allow_null=True)
+    priority = serializers.CharField(required=False, allow_null=True)
+
+    def validate_priority(self, value):
+        if value is None:
+            return None
+        try:
+            return find_priority(value)
+        except Priority.DoesNotExist:
+            raise serializers.ValidationError(f"Unknown priority {value!r}")
+
+
+def read_import_file(upload):
+    """
+    Rows of an uploaded CSV or JSON file, as dicts.
+
+    CSV files need a header row naming the columns; blank cells are left out
+    so defaults apply. JSON files hold a list of items, or {"items": [...]}.
+    Files over BULK_IMPORT_MAX_SIZE raise ValueError without being read.
+    """
+    if upload.size > BULK_IMPORT_MAX_SIZE:
+        raise ValueError(f"Files can be at most {BULK_IMPORT_MAX_SIZE} bytes")
+
+    text = upload.read().decode("utf-8-sig")
+
+    if upload.name.lower().endswith(".json"):
+        rows = json.loads(text)
+        if isinstance(rows, dict):
+            rows = rows.get("items")
+        if not isinstance(rows, list):
+            raise ValueError("The JSON file must hold a list of items")
+        return rows
+
+    reader = csv.DictReader(io.StringIO(text))
+    return [
+        {
+            column.strip(): value
+            for column, value in row.items()
+            if column and column.strip() in BULK_ITEM_FIELDS and value not in ("", None)
+        }
+        for row in reader
+    ]
+
+
 class WishlistItemViewSet(viewsets.ViewSet):
     """View for interacting with user wishlists"""
 
@@ -71,7 +137,7 @@ class WishlistItemViewSet(viewsets.ViewSet):
         wishlist = Wishlist.objects.get(pk=wishlist_id)
 
         priority_id = request.data.get("priority")
-        priority = Priority.objects.get(pk=priority_id)
+        priority = get_priority(priority_id)
 
         new_item = WishlistItem()
         # Get the data from the client's JSON payload
@@ -186,7 +252,7 @@ class WishlistItemViewSet(viewsets.ViewSet):
         priority_id = request.data.get("priority")
         if priority_id:
             try:
-                priority = Priority.objects.get(pk=priority_id)
+                priority = get_priority(priority_id)
                 item.priority = priority
             except Priority.DoesNotExist:
                 return Response(
@@ -242,3 +308,127 @@ class WishlistItemViewSet(viewsets.ViewSet):
 
         serializer = WishlistItemSerializer(item, context={"request": request})
         return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="bulk",
+        parser_classes=[JSONParser, MultiPartParser],
+    )
+    @idempotent
+    def bulk_create(self, request):
+        """
+        Create many items on one wishlist, from JSON or an uploaded file.
+
+        @api {POST} /wishlist_items/bulk Bulk create Wishlist items
+        @apiName BulkCreateWishlistItems
+        @apiGroup Wishlists
+
+        @apiHeader {String} Authorization Auth token
+        @apiHeader {String} [Idempotency-Key] Retries with the same key replay
+            the first response instead of writing again, for 24 hours
+        @apiHeaderExample {String} Authorization:
+            Token d74b97fbe905134520bb236b0016703f50380dcf
+
+        @apiBody {Number} wishlist Wishlist ID, owned by the user.
+        @apiBody {Object[]} [items] Items with the fields of POST /wishlist_items.
+            priority may be a priority ID or name.
+        @apiBody {File} [file] Instead of items, a multipart/form-data upload of a
+            .csv file with a header row (name, quantity, website_url, note,
+            priority) or a .json file holding the items, of at most 1 MB.
+        @apiParamExample {json} Input
+            {
+                "wishlist": 1,
+                "items": [
+                    {"name": "Stand mixer", "priority": "Must-Have"},
+                    {"name": "Tea towels", "quantity": 4, "priority": 3}
+                ]
+            }
+
+        @apiSuccess (201) {Object[]} items Created items, in input order.
+
+        @apiError (400) {Object[]} errors Every invalid row, by 1-based row
+            number. Nothing is created unless every row is valid.
+            {
+                "errors": [
+                    {"row": 2, "errors": {"quantity": ["Ensure this value is greater than or equal to 1."]}}
+                ]
+            }
+        """
+        if not isinstance(request.data, dict):
+            return Response(
+                {"message": "Send an object with the wishlist and its items"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            wishlist = Wishlist.objects.get(pk=request.data.get("wishlist"))
+        except (Wishlist.DoesNotExist, ValueError, TypeError):
+            return Response(
+                {"message": "Wishlist not found"}, status=status.HTTP_404_NOT_FOUND
+            )
+
+        if wishlist.user_id != request.user.id:
+            return Response(
+                {"message": "You are not authorized to add items to this wishlist"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        if "file" in request.data:
+            try:
+                rows = read_import_file(request.data["file"])
+            except (ValueError, UnicodeDecodeError, csv.Error) as ex:
+                return Response(
+                    {"message": f"Could not read the file: {ex}"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        else:
+            rows = request.data.get("items")
+
+        if not isinstance(rows, list) or not rows:
+            return Response(
+                {"message": "Provide a list of items or an import file"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(rows) > BULK_ITEMS_MAX:
+            return Response(
+                {"message": f"At most {BULK_ITEMS_MAX} items can be added at once"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Validate every row before writing anything. Priorities resolve from
+        # the in-process registry, so this runs no queries.
+        serializer = WishlistItemImportSerializer(data=rows, many=True)
+        if not serializer.is_valid():
+            errors = serializer.errors
+            # Row errors come keyed by index, or as a list with a gap for
+            # each valid row, depending on the DRF version
+            if isinstance(errors, list):
+                errors = dict(enumerate(errors))
+            if not all(isinstance(index, int) for index in errors):
+                # The payload itself was malformed
+                return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+            return Response(
+                {
+                    "errors": [
+                        {"row": index + 1, "errors": row_errors}
+                        for index, row_errors in sorted(errors.items())
+                        if row_errors
+                    ]
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        items = [
+            WishlistItem(wishlist=wishlist, **row) for row in serializer.validated_data
+        ]
+        with transaction.atomic():
+            WishlistItem.objects.bulk_create(items)
+
+            # bulk_create sends no signals, so refresh cached responses here
+            bump_generation(WishlistItem)
+            bump_versions("wishlist", wishlist.pk)
+            bump_versions("wishlists", wishlist.user_id)
+
+        serializer = WishlistItemSerializer(items, many=True)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
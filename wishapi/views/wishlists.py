@@ -2,13 +2,51 @@ from rest_framework import viewsets
 from rest_framework.response import Response
 from rest_framework import serializers, status
 from django.contrib.auth.models import User
-from wishapi.models import Wishlist, WishlistItem, Friend
+from wishapi.models import Wishlist, WishlistItem, Friend, Priority, Purchase
 from django.http import HttpResponseServerError
-from django.db.models import Q
+from django.db import transaction
 from wishapi.views import UserSerializer
+from wishapi.services import (
+    friend_ids,
+    publish_wishlist,
+    retract_wishlist,
+    feed_for,
+    events_between,
+    next_events,
+    invalidate_next_events,
+    search,
+    priority_name,
+    priority_ids,
+)
+from wishapi.pagination import FeedPagination
+from wishapi.response_cache import cached_response
+from wishapi.conditional import etag
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
-from datetime import datetime, timedelta
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from datetime import datetime, time
+
+
+def parse_event_date(value, end_of_day=False):
+    """
+    Parse an ISO 8601 date or datetime query param into an aware datetime.
+
+    A date without a time is read as the start of that day, or as its end
+    when end_of_day is set, so a window ending on a date includes it.
+    """
+    date = parse_date(value)
+    if date is not None:
+        parsed = datetime.combine(date, time.max if end_of_day else time.min)
+    else:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            raise ValueError(f"Invalid date: {value}")
+
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+
+    return parsed
 
 
 class WishlistEventSerializer(serializers.ModelSerializer):
@@ -21,6 +59,10 @@ class WishlistEventSerializer(serializers.ModelSerializer):
         fields = ("id", "user", "title", "date_of_event")
 
 
+def serialize_events(wishlists):
+    return list(WishlistEventSerializer(wishlists, many=True).data)
+
+
 class WishlistItemSerializer(serializers.ModelSerializer):
     priority_name = serializers.SerializerMethodField()
 
@@ -41,13 +83,12 @@ class WishlistItemSerializer(serializers.ModelSerializer):
         )
 
     def get_priority_name(self, obj):
-        return obj.priority.name if obj.priority else None
+        return priority_name(obj.priority_id)
 
 
-class WishlistSerializer(serializers.ModelSerializer):
-    """JSON serializer for public wishlists"""
+class WishlistHeaderSerializer(serializers.ModelSerializer):
+    """JSON serializer for wishlist details without their items"""
 
-    wishlist_items = WishlistItemSerializer(many=True, source="items_in_list")
     user = UserSerializer()
 
     class Meta:
@@ -63,15 +104,25 @@ class WishlistSerializer(serializers.ModelSerializer):
             "date_of_event",
             "pinned",
             "private",
-            "wishlist_items",
         )
 
 
+class WishlistSerializer(WishlistHeaderSerializer):
+    """JSON serializer for public wishlists"""
+
+    wishlist_items = WishlistItemSerializer(many=True, source="items_in_list")
+
+    class Meta(WishlistHeaderSerializer.Meta):
+        fields = WishlistHeaderSerializer.Meta.fields + ("wishlist_items",)
+
+
 class WishlistViewSet(viewsets.ViewSet):
     """View for interacting with user wishlists"""
 
     permission_classes = [IsAuthenticated]
 
+    @etag(lambda request: [("wishlists", request.user.pk)], Priority, User)
+    @cached_response(Wishlist, WishlistItem, Purchase, Priority, User)
     def list(self, request):
         """
         @api {GET} /wishlists GET user's wishlists
@@ -82,6 +133,9 @@ class WishlistViewSet(viewsets.ViewSet):
         @apiHeaderExample {String} Authorization
             Token 9ba45f09651c5b0c404f37a2d2572c026c146611
 
+        @apiQuery {String} [q] Only return wishlists whose title or description contains
+            every word, matched as word prefixes, best matches first
+
         @apiSuccess (200) {Object[]} public_wishlists Array of public wishlist objects
         @apiSuccess (200) {id} public_wishlists.id Wishlist id
         @apiSuccess (200) {Number} public_wishlists.user User id associated with the wishlist
@@ -163,22 +217,17 @@ class WishlistViewSet(viewsets.ViewSet):
         search_text = request.query_params.get("q", None)
         try:
             user = request.auth.user
+            wishlists = Wishlist.objects.filter(user=user).order_by("id")
             if search_text:
-                public_wishlists = Wishlist.objects.filter(
-                    Q(title__contains=search_text)
-                    | Q(description__contains=search_text),
-                    private=False,
-                    user=user,
-                )
-                private_wishlists = Wishlist.objects.filter(
-                    Q(title__contains=search_text)
-                    | Q(description__contains=search_text),
-                    private=True,
-                    user=user,
-                )
-            else:
-                public_wishlists = Wishlist.objects.filter(private=False, user=user)
-                private_wishlists = Wishlist.objects.filter(private=True, user=user)
+                # Best matches first
+                wishlists = search(wishlists, search_text).order_by("search_rank", "id")
+
+            # Load every list with its items in one pass, then split by privacy
+            wishlists = list(wishlists.with_items())
+            public_wishlists = [
+                wishlist for wishlist in wishlists if not wishlist.private
+            ]
+            private_wishlists = [wishlist for wishlist in wishlists if wishlist.private]
 
             public_serializer = WishlistSerializer(
                 public_wishlists, many=True, context={"request": request}
@@ -197,6 +246,8 @@ class WishlistViewSet(viewsets.ViewSet):
         except Exception as ex:
             return HttpResponseServerError(ex)
 
+    @etag(lambda request, pk: [("wishlist", pk)], Priority, User)
+    @cached_response(Wishlist, WishlistItem, Purchase, Priority, User)
     def retrieve(self, request, pk=None):
         """
         Retrieve details of a single wishlist.
@@ -210,6 +261,9 @@ class WishlistViewSet(viewsets.ViewSet):
             Token d74b97fbe905134520bb236b0016703f50380dcf
 
         @apiParam {Number} pk Wishlist's unique ID.
+        @apiQuery {String} [q] Only return items whose name or note contains every word,
+            matched as word prefixes, best matches first
+        @apiQuery {String} [priority_level] Only return items with this priority name
 
         @apiSuccess {Number} id Wishlist ID.
         @apiSuccess {Number} user User ID.
@@ -262,36 +316,22 @@ class WishlistViewSet(viewsets.ViewSet):
         """
 
         try:
-            # Retrieve the wishlist object
-            wishlist = Wishlist.objects.get(pk=pk)
-
-            # Retrieve all items associated with the wishlist
-            queryset = wishlist.items_in_list.all()
+            items = WishlistItem.objects.all()
             search_text = request.query_params.get("q", None)
             priority_level = request.query_params.get("priority_level", None)
 
             # Apply filters based on search text and priority level
             if search_text:
-                queryset = queryset.filter(Q(name__icontains=search_text))
+                items = search(items, search_text).order_by("search_rank", "id")
             if priority_level:
-                queryset = queryset.filter(priority__name=priority_level)
-
-            # Serialize the wishlist object
-            wishlist_serializer = WishlistSerializer(
-                wishlist, context={"request": request}
-            )
-            wishlist_data = wishlist_serializer.data
-
-            # Serialize the filtered items
-            items_serializer = WishlistItemSerializer(
-                queryset, many=True, context={"request": request}
-            )
-            items_data = items_serializer.data
+                items = items.filter(priority_id__in=priority_ids(priority_level))
 
-            # Combine wishlist data with filtered items data
-            wishlist_data["wishlist_items"] = items_data
+            # Retrieve the wishlist with only the matching items prefetched
+            wishlist = Wishlist.objects.with_items(items).get(pk=pk)
 
-            return Response(wishlist_data)
+            # Serialize the wishlist and its filtered items in a single pass
+            serializer = WishlistSerializer(wishlist, context={"request": request})
+            return Response(serializer.data)
 
         except Wishlist.DoesNotExist:
             return Response(
@@ -364,7 +404,10 @@ class WishlistViewSet(viewsets.ViewSet):
 
         try:
 
-            new_list.save()
+            with transaction.atomic():
+                new_list.save()
+                publish_wishlist(new_list, created=new_list.creation_date)
+                invalidate_next_events(user.id, *friend_ids(user.id))
 
             serializer = WishlistSerializer(new_list, context={"request": request})
             return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -396,7 +439,10 @@ class WishlistViewSet(viewsets.ViewSet):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        wishlist.delete()
+        with transaction.atomic():
+            wishlist.delete()
+            retract_wishlist(wishlist)
+            invalidate_next_events(wishlist.user_id, *friend_ids(wishlist.user_id))
 
         return Response({}, status=status.HTTP_204_NO_CONTENT)
 
@@ -449,7 +495,7 @@ class WishlistViewSet(viewsets.ViewSet):
 
         try:
             # Retrieve the wishlist object
-            wishlist = Wishlist.objects.get(pk=pk)
+            wishlist = Wishlist.objects.with_items().get(pk=pk)
 
             # Check if the authenticated user is the owner of the wishlist
             if wishlist.user != request.user:
@@ -458,6 +504,8 @@ class WishlistViewSet(viewsets.ViewSet):
                     status=status.HTTP_403_FORBIDDEN,
                 )
 
+            was_private = wishlist.private
+
             # Update wishlist fields based on request data
             wishlist.title = request.data.get("title")
             wishlist.description = request.data.get("description")
@@ -469,8 +517,14 @@ class WishlistViewSet(viewsets.ViewSet):
             if "pinned" in request.data:
                 wishlist.pinned = request.data.get("pinned")
 
-            # Save the updated wishlist
-            wishlist.save()
+            # Save the updated wishlist and update friends' feeds if privacy changed
+            with transaction.atomic():
+                wishlist.save()
+                if was_private and not wishlist.private:
+                    publish_wishlist(wishlist)
+                elif wishlist.private and not was_private:
+                    retract_wishlist(wishlist)
+                invalidate_next_events(wishlist.user_id, *friend_ids(wishlist.user_id))
 
             # Serialize the updated wishlist and return the response
             serializer = WishlistSerializer(wishlist, context={"request": request})
@@ -489,43 +543,39 @@ class WishlistViewSet(viewsets.ViewSet):
         """
         Retrieve recent wishlists created by friends within the last two weeks.
 
-        This method retrieves wishlists created by friends of the authenticated user
-        that were created within the last two weeks. It calculates the date two weeks
-        ago from the current date and filters wishlists based on this timeframe.
-
-        Returns:
-            Response: A JSON response containing recent wishlists created by friends.
+        Friends' public wishlists are pushed into the user's feed when they are
+        created or made public, so this reads one indexed page of the feed
+        rather than scanning wishlists.
 
-        Raises:
-            ValueError: If the query for retrieving friends' wishlists encounters an error.
+        Query params:
+            cursor: Opaque cursor taken from a previous page's next/previous link.
+            page_size: Wishlists per page (default 20, max 100).
 
+        Returns:
+            Response: A cursor paginated JSON response containing recent wishlists
+            created by friends, newest first.
         """
 
         try:
             user = request.user
 
-            # Calculate the date two weeks ago
-            two_weeks_ago = datetime.now() - timedelta(weeks=2)
-
-            # Retrieve friends associated with the user
-            friends = Friend.objects.filter(
-                Q(user1_id=user.id) | Q(user2_id=user.id), accepted=True
-            )
-
-            # Get the users who are friends with the current user
-            friends_users = [
-                friend.user1 if friend.user2 == user else friend.user2
-                for friend in friends
-            ]
-
-            # Retrieve public wishlists of friends created within the last two weeks
-            friend_recent_wishlists = Wishlist.objects.filter(
-                user__in=friends_users, creation_date__gte=two_weeks_ago, private=False
+            # Read one page of the user's feed, then load its wishlists' details
+            paginator = FeedPagination()
+            page = paginator.paginate_queryset(feed_for(user.id), request, view=self)
+            wishlists = Wishlist.objects.with_items().in_bulk(
+                [entry.wishlist_id for entry in page]
             )
 
             # Serialize friend wishlists
-            serializer = WishlistSerializer(friend_recent_wishlists, many=True)
-            return Response(serializer.data)
+            serializer = WishlistSerializer(
+                [
+                    wishlists[entry.wishlist_id]
+                    for entry in page
+                    if entry.wishlist_id in wishlists
+                ],
+                many=True,
+            )
+            return paginator.get_paginated_response(serializer.data)
 
         except Exception as e:
             return Response(
@@ -533,48 +583,51 @@ class WishlistViewSet(viewsets.ViewSet):
             )
 
     @action(detail=False, methods=["get"])
+    # Events drop out as they pass, so don't keep responses for long
+    @cached_response(Wishlist, Friend, User, timeout=60)
     def upcoming_events(self, request):
         """
-        Retrieve events with a non-empty date_of_event field from user's own wishlists
-        and public wishlists of friends.
+        Retrieve upcoming events from user's own wishlists and public wishlists of friends.
 
-        This method retrieves events with a non-empty date_of_event field from both
-        the personal wishlists of the authenticated user and the public wishlists of their friends.
+        This method retrieves wishlists with a date_of_event inside a date window from
+        both the personal wishlists of the authenticated user and the public wishlists
+        of their friends, soonest first. Without a window, the user's next events are
+        served from a per-user cache.
+
+        Query params:
+            from: Start of the window, ISO 8601 date or datetime (default now).
+            to: End of the window, ISO 8601 date or datetime (default open ended).
+                A date alone includes the whole day.
+            limit: Maximum number of events to return (default 20, max 100).
 
         Returns:
-            Response: A JSON response containing events with a non-empty date_of_event field
-            from personal wishlists and public wishlists of friends.
+            Response: A JSON response containing events inside the window, ordered
+            by date_of_event.
         """
 
         try:
             user = request.user
 
-            # Retrieve personal wishlists of the user
-            personal_wishlists = Wishlist.objects.filter(
-                user=user, date_of_event__isnull=False
-            )
-
-            # Retrieve friends associated with the user
-            friends = Friend.objects.filter(
-                Q(user1=user) | Q(user2=user), accepted=True
-            )
+            start = request.query_params.get("from", None)
+            end = request.query_params.get("to", None)
+            try:
+                limit = int(request.query_params.get("limit", 20))
+                start = parse_event_date(start) if start else None
+                end = parse_event_date(end, end_of_day=True) if end else None
+            except ValueError as ex:
+                return Response({"error": str(ex)}, status=status.HTTP_400_BAD_REQUEST)
 
-            # Get the users who are friends with the current user
-            friends_users = [
-                friend.user1 if friend.user2 == user else friend.user2
-                for friend in friends
-            ]
+            limit = max(1, min(limit, 100))
 
-            # Retrieve public wishlists of friends with non-empty date_of_event
-            friends_wishlists = Wishlist.objects.filter(
-                user__in=friends_users, private=False, date_of_event__isnull=False
-            )
+            if start is None and end is None:
+                # Serve the user's next events from the cache
+                events = next_events(user.id, limit, serialize_events)
+                return Response(events)
 
-            # Combine personal and friends' wishlists
-            all_wishlists = personal_wishlists | friends_wishlists
+            wishlists = events_between(user.id, start or timezone.now(), end)[:limit]
 
             # Serialize events
-            serializer = WishlistEventSerializer(all_wishlists, many=True)
+            serializer = WishlistEventSerializer(wishlists, many=True)
             return Response(serializer.data)
 
         except Exception as e:
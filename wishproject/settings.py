@@ -34,7 +34,7 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'wishapi.authentication.CachedTokenAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -58,6 +58,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'wishapi.routers.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'wishproject.urls'
@@ -88,7 +89,49 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        # Reuse connections across requests, checking them before reuse
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Take the write lock when a transaction starts, so concurrent
+            # writers wait out busy_timeout instead of failing to upgrade.
+            # Needs Django 5.1 or later
+            'transaction_mode': 'IMMEDIATE',
+        },
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
+    },
+    # A local read replica, kept in sync with `manage.py sync_replicas`.
+    # It is only read from once listed in DATABASE_REPLICAS.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.replica.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    },
+}
+
+# Aliases that safe-method requests read from, see wishapi.routers
+DATABASE_REPLICAS = []
+DATABASE_ROUTERS = ['wishapi.routers.PrimaryReplicaRouter']
+
+# Seconds a client reads from the primary after writing, and after which
+# cache invalidations are repeated, to cover replication delay
+REPLICA_LAG = 5
+
+# Applied to every new SQLite connection, see wishapi.signals. WAL lets
+# readers run while a write is in progress.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -20000,
+    'mmap_size': 128 * 1024 * 1024,
+    'temp_store': 'MEMORY',
 }
 
 
@@ -135,3 +178,19 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 MEDIA_ROOT = 'media'
 MEDIA_URL = '/media/'
+
+# Uploads are named by content hash and shared, see wishapi.storage
+STORAGES = {
+    'default': {
+        'BACKEND': 'wishapi.storage.ContentAddressedStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+# Set to 'x-sendfile' (Apache, lighttpd) or 'x-accel-redirect' (nginx) to have
+# the front proxy send media files instead of Django. For nginx, map
+# MEDIA_ACCEL_REDIRECT_LOCATION to MEDIA_ROOT in an internal location.
+MEDIA_SENDFILE = None
+MEDIA_ACCEL_REDIRECT_LOCATION = '/protected-media/'
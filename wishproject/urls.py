@@ -1,6 +1,5 @@
 from django.contrib import admin
 from django.urls import include, path
-from django.conf.urls.static import static
 from django.conf import settings
 from rest_framework import routers
 from rest_framework.authtoken.views import obtain_auth_token
@@ -13,6 +12,9 @@ from wishapi.views import (
     WishlistItemViewSet,
     PurchaseViewSet,
     PinViewSet,
+    profile_dashboard,
+    profile_dashboard_detail,
+    serve_media,
 )
 
 
@@ -38,9 +40,20 @@ urlpatterns = [
         WishlistViewSet.as_view({"get": "friends_recent_wishlists"}),
         name="friends_recent_wishlist",
     ),
+    path("async/profile", profile_dashboard, name="profile_dashboard"),
+    path(
+        "async/profile/<int:pk>",
+        profile_dashboard_detail,
+        name="profile_dashboard_detail",
+    ),
     path(
         "upcoming_events",
         WishlistViewSet.as_view({"get": "upcoming_events"}),
         name="upcoming_event",
     ),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    path(
+        f"{settings.MEDIA_URL.lstrip('/')}<path:path>",
+        serve_media,
+        name="media",
+    ),
+]